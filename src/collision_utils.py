@@ -2,6 +2,7 @@
 Shared collision handling utilities to reduce code duplication
 """
 import pygame
+from spatial_hash import nearby_rects
 
 
 def handle_collision_axis(position, rect_size, collision_rects, entity_group, delta, axis='x'):
@@ -11,7 +12,7 @@ def handle_collision_axis(position, rect_size, collision_rects, entity_group, de
     Args:
         position: Current position as pygame.Vector2
         rect_size: Tuple of (width, height) for the entity
-        collision_rects: List of collision rectangles
+        collision_rects: List of collision rectangles, or a SpatialHash of them
         entity_group: Group of entities to check collision with (can be None)
         delta: Movement delta for this axis
         axis: 'x' or 'y' to indicate which axis to process
@@ -38,8 +39,8 @@ def handle_collision_axis(position, rect_size, collision_rects, entity_group, de
     collision_found = False
     closest_pos = position.x if axis == 'x' else position.y
     
-    # Check collisions with static rects
-    for rect in collision_rects:
+    # Check collisions with static rects (only the nearby ones when they're indexed)
+    for rect in nearby_rects(collision_rects, entity_rect):
         if entity_rect.colliderect(rect):
             collision_found = True
             if axis == 'x':
@@ -86,7 +87,7 @@ def handle_full_collision(position, rect_size, collision_rects, entity_group, dx
     Args:
         position: Current position as pygame.Vector2 (modified in place)
         rect_size: Tuple of (width, height) for the entity
-        collision_rects: List of collision rectangles
+        collision_rects: List of collision rectangles, or a SpatialHash of them
         entity_group: Group of entities to check collision with (can be None)
         dx: Horizontal movement delta
         dy: Vertical movement delta
@@ -0,0 +1,40 @@
+"""
+Mutable collision geometry shared by every entity
+"""
+from spatial_hash import SpatialHash
+
+
+class CollisionWorld(SpatialHash):
+    """The map's static collision rects, spatially indexed and editable at runtime
+
+    Created once by tiles.load_tileset and handed by reference to the player,
+    enemies, projectiles and the nav grid, so a lock door opening is one edit
+    everybody sees. Rects that belong to a removable tile (lock walls) are
+    added under that tile's handle, so opening or respawning a door only touches
+    that tile's rects instead of rebuilding anything.
+    """
+
+    def __init__(self, rects=(), cell_size=16):
+        self.tile_rects = {}  # (tile_x, tile_y) -> rects added under that tile handle
+        super().__init__(rects, cell_size)
+
+    def add(self, rect, tile=None):
+        """Add a rect, optionally under a tile handle so it can be removed with remove_tile"""
+        self.insert(rect)
+        if tile is not None:
+            self.tile_rects.setdefault(tile, []).append(rect)
+
+    def remove_tile(self, tile):
+        """Remove every rect added under a tile handle
+
+        Returns:
+            list: The removed rects (hand them back to add_tile to restore the tile)
+        """
+        rects = self.tile_rects.pop(tile, [])
+        for rect in rects:
+            self.remove(rect)
+        return rects
+
+    def add_tile(self, tile, rects):
+        for rect in rects:
+            self.add(rect, tile)
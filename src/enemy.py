@@ -5,23 +5,44 @@ from enemy_animator import EnemyAnimator
 from enemy_behaviors import EnemyBehaviors
 from enemy_renderer import EnemyRenderer
 from enemy_sensors import EnemySensors
+from nav_grid import NavGrid
+from sight_grid import SightGrid
+from field_of_view import FieldOfView
 from collision_utils import handle_full_collision
 from sprite_utils import load_directional_sprites, load_icon_sprites
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, position, player_ref, collision_rects, patrol_path=None, items_group=None, wall_tiles=None, slow_tiles=None, map_width=0, map_height=0):
+    def __init__(self, position, player_ref, collision_rects, patrol_path=None, items_group=None, terrain=None, map_width=0, map_height=0, *, nav_grid=None, path_hierarchy=None, chase_flow_field=None, path_scheduler=None, path_workers=None, path_cache=None, sight_grid=None, vision=None, sight_cache=None):
         super().__init__()
         self.position = pygame.Vector2(position)
         self.player_ref = player_ref
         self.collision_rects = collision_rects
         self.items_group = items_group
         
-        # Store tile lookup dictionaries for efficient pathfinding
-        self.wall_tiles = wall_tiles or {}
-        self.slow_tiles = slow_tiles or {}
+        # Shared per-tile terrain flags (wall / slow / hide), see TerrainMap
+        self.terrain = terrain
         self.map_width = map_width
         self.map_height = map_height
         
+        # Shared navigation cost grid (built once in game.py); fall back to a private one
+        self.nav_grid = nav_grid or NavGrid(map_width, map_height, 16, terrain, collision_rects)
+        # Shared HPA* abstraction for long-range queries (None = distance caps apply)
+        self.path_hierarchy = path_hierarchy
+        # Shared flow field toward the player, read by every chasing enemy (None = per-enemy search)
+        self.chase_flow_field = chase_flow_field
+        # Shared frame-budgeted queue for path searches (None = search immediately)
+        self.path_scheduler = path_scheduler
+        # Optional process pool that solves path requests off the main thread (takes precedence)
+        self.path_workers = path_workers
+        # Shared LRU cache of solved tile paths (None = always search)
+        self.path_cache = path_cache
+        # Shared opaque-tile grid for line of sight checks; fall back to a private one
+        self.sight_grid = sight_grid or SightGrid(collision_rects, map_width, map_height)
+        # Shared batched range/cone tests for all enemies (None = this enemy tests on its own)
+        self.vision = vision
+        # Shared LRU cache of line of sight results (None = always raycast)
+        self.sight_cache = sight_cache
+        
         # Initialize modular components
         self.animator = EnemyAnimator()
         self.behaviors = EnemyBehaviors(self)
@@ -46,6 +67,8 @@ class Enemy(pygame.sprite.Sprite):
         self.close_hearing_range = 32
         self.sight_range = 60
         self.vision_cone_angle = 90
+        # Walls-aware field of view, shared by the sensors and the vision cone drawing
+        self.fov = FieldOfView(self.nav_grid, self.sight_grid, self.sight_range)
         self.attack_range = 5
         self.bullet_speed = 150
         self.last_AI_check = 0
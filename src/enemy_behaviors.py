@@ -1,8 +1,10 @@
 import pygame
 import random
-import heapq
 from state_utils import check_hiding_spot_at_position, update_wary_flags, transition_to_chase, transition_to_patrol
 from movement_utils import get_closest_cardinal_direction, move_towards_target
+from pathfinding import find_path_steps, run_search
+from incremental_pathfinding import IncrementalPlanner
+from path_smoothing import smooth_path
 
 
 class EnemyBehaviors:
@@ -13,101 +15,198 @@ class EnemyBehaviors:
         self.prev_pathfind_length = 0
         self.current_path = []
         self.pathfind_cooldown = 1500
+        
+        # Incremental chase planner (created on the first chase replan); its replans are
+        # repairs of the previous search, so they can run at AI-tick rate
+        self.chase_planner = None
+        self.incremental_pathfind_cooldown = 333
         self.last_player_position = None  # Track last known player position for optimization
         
+        # Distance caps (manhattan tiles) for Jump Point Search calls - JPS only spends its
+        # node budget on jump points, so it can look much further than plain A* (25/35/50)
+        self.chase_path_length = 75
+        self.inspect_path_length = 105
+        self.return_path_length = 150
+        
+        # Drop tile-center waypoints the enemy can walk straight past (see path_smoothing.py)
+        self.smooth_paths = True
+        
+        # (cache key, nav grid version) of the search this enemy has queued: it keeps the start
+        # tile it was submitted with, so its result is cached under that start, not a later one
+        self.queued_cache_key = None
+        
         # Stuck detection for wall-running fix
         self.last_position = None
         self.stuck_timer = 0.0
         self.stuck_threshold = 0.5  # seconds before considering enemy "stuck"
         self.min_movement_distance = 5.0  # minimum distance to consider as "movement" 
 
-    """A* with 8 directions for better agent movement"""
-    def _a_star_pathfind(self, start_position, goal_position, tile_size = 16, max_path_length=25, debug=False):
+    """A* with 8 directions for better agent movement
+    method="jps" uses Jump Point Search instead, which can afford much longer searches.
+    Goals past max_path_length use the enemy's HierarchicalPathfinder when it has one.
+    With scheduled=True the search goes through the enemy's PathScheduler or PathWorkerPool
+    (if any) and None is returned until it has been solved"""
+    def _a_star_pathfind(self, start_position, goal_position, tile_size = 16, max_path_length=25, debug=False, method="astar", scheduled=False):
         start_grid = (int(start_position.x // tile_size), int(start_position.y // tile_size))
         goal_grid = (int(goal_position.x // tile_size), int(goal_position.y // tile_size))
         
         if debug:
             print(f"A* pathfinding from {start_grid} to {goal_grid}")
         
-        # Early exit if goal is too far away (performance optimization)
-        manhattan_distance = abs(start_grid[0] - goal_grid[0]) + abs(start_grid[1] - goal_grid[1])
-        if manhattan_distance > max_path_length:
-            if debug:
-                print(f"Goal too far: {manhattan_distance} > {max_path_length}")
-            return []  # Return empty path if too far
-        
-        # 8-directional movement and cost
-        directions = [(0,1), (0,-1), (1,0), (-1,0), (1,1), (1,-1), (-1,1), (-1,-1)]
-        diagonal_cost = 1.414
+        make_steps = lambda: self._a_star_pathfind_steps(start_grid, goal_grid, max_path_length, debug, method)
+        job = (method, start_grid, (goal_grid,), max_path_length)
+        cache_key = (start_grid, goal_grid, (method, max_path_length))
+        tile_path = self._request_path((method, goal_grid), make_steps, job, cache_key, scheduled)
         
-        priorityqueue = [(0, 0, start_grid, [(start_position.x, start_position.y)])]
-        pathfinding = set()
-        nodes_expanded = 0  # Track performance
-        max_nodes = 300  # Reduced from 500 to 300 for better performance
+        if tile_path is None:
+            return None  # still queued
+        return self._tiles_to_positions(tile_path, tile_size)
+    
+    def _a_star_pathfind_steps(self, start_grid, goal_grid, max_path_length, debug, method):
+        """Resumable body of _a_star_pathfind, returns a tile path"""
+        # Parent-pointer A* (or JPS) over the shared nav grid, HPA* for far goals, see pathfinding.py
+        hierarchy = self.enemy.path_hierarchy
+        if debug and hierarchy is None:
+            manhattan_distance = abs(start_grid[0] - goal_grid[0]) + abs(start_grid[1] - goal_grid[1])
+            if manhattan_distance > max_path_length:
+                print(f"Goal too far: {manhattan_distance} > {max_path_length}")
+        tile_path = yield from find_path_steps(self.enemy.nav_grid, start_grid, goal_grid, max_path_length, method, hierarchy)
         
-        while priorityqueue and nodes_expanded < max_nodes:
-            _, goal_cost, current, path = heapq.heappop(priorityqueue)
-            
-            if current in pathfinding:
-                continue
-            pathfinding.add(current)
-            nodes_expanded += 1
-            
-            if current == goal_grid:
-                return [pygame.Vector2(pos) for pos in path[1:]]
-            
-            for diagonal_x, diagonal_y in directions:
-                neighbor = (current[0] + diagonal_x, current[1] + diagonal_y)
-                
-                if neighbor in pathfinding:
-                    continue
-                
-                # Check bounds - make sure neighbor is within map
-                # Convert map dimensions from pixels to tiles if needed
-                map_width_tiles = self.enemy.map_width // tile_size if self.enemy.map_width > 100 else self.enemy.map_width
-                map_height_tiles = self.enemy.map_height // tile_size if self.enemy.map_height > 100 else self.enemy.map_height
-                
-                if (neighbor[0] < 0 or neighbor[0] >= map_width_tiles or 
-                    neighbor[1] < 0 or neighbor[1] >= map_height_tiles):
-                    continue
-                
-                # Check for diagonal corner cutting so the agents don't clip thru walls
-                if diagonal_x != 0 and diagonal_y != 0:
-                    # Check intermediate tiles for diagonal movement to prevent corner cutting
-                    intermediate_x = current[0] + diagonal_x
-                    intermediate_y = current[1] + diagonal_y
-                    
-                    # Ensure intermediate tiles are within bounds before checking
-                    if (0 <= intermediate_x < map_width_tiles and 0 <= intermediate_y < map_height_tiles and
-                        0 <= current[0] + diagonal_x < map_width_tiles and 0 <= current[1] + diagonal_y < map_height_tiles):
-                        
-                        if (self._get_tile_weight(current[0] + diagonal_x, current[1]) == float('inf') or 
-                            self._get_tile_weight(current[0], current[1] + diagonal_y) == float('inf')):
-                            continue
-                    else:
-                        # If intermediate tiles are out of bounds, skip this diagonal move
-                        continue
-                
-                move_cost = self._get_tile_weight(neighbor[0], neighbor[1])
-                if move_cost == float('inf'):
-                    continue
-
-                # Add in diagonal cost
-                if diagonal_x != 0 and diagonal_y != 0:
-                    move_cost *= diagonal_cost
-                
-                new_goal_cost = goal_cost + move_cost
-                h_cost = abs(neighbor[0] - goal_grid[0]) + abs(neighbor[1] - goal_grid[1])
-                
-                neighbor_pos = (neighbor[0] * tile_size + tile_size // 2,
-                            neighbor[1] * tile_size + tile_size // 2)
-                
-                heapq.heappush(priorityqueue, (new_goal_cost + h_cost, new_goal_cost,\
-                                               neighbor, path + [neighbor_pos]))
+        if debug and not tile_path:
+            print(f"A* failed to find path from {start_grid} to {goal_grid}")
+        return tile_path
+    
+    def _chase_pathfind(self, enemy_pos, player_pos, tile_size=16):
+        """Path toward the player for chase: read from the shared flow field (one Dijkstra per
+        player tile for all chasers), else repaired by this enemy's incremental planner, else
+        searched with JPS. Returns None while the request waits in the path scheduler
+        (worker pool requests skip the flow field and planner, which live in this process)"""
+        enemy_tile = (int(enemy_pos.x // tile_size), int(enemy_pos.y // tile_size))
+        player_tile = (int(player_pos.x // tile_size), int(player_pos.y // tile_size))
+        
+        job = ("jps", enemy_tile, (player_tile,), self.chase_path_length)
+        tile_path = self._request_path(("chase", player_tile), lambda: self._chase_pathfind_steps(enemy_tile, player_tile), job)
+        if tile_path is None:
+            return None
+        return self._tiles_to_positions(tile_path, tile_size)
+    
+    def _chase_pathfind_steps(self, enemy_tile, player_tile):
+        """Resumable body of _chase_pathfind, returns a tile path"""
+        # The shared field already holds the best route from every tile, so each chaser only
+        # pays for walking its own path
+        flow_field = self.enemy.chase_flow_field
+        if flow_field is not None:
+            yield from flow_field.update_steps(player_tile)  # a rebuild is sliced like any search
+            tile_path = flow_field.path_from(enemy_tile)
+            if tile_path:
+                return tile_path
+        
+        # No shared field, or no route in it from here: repair this enemy's own search
+        if self.chase_planner is None:
+            self.chase_planner = IncrementalPlanner(self.enemy.nav_grid)
+        tile_path = yield from self.chase_planner.plan_steps(enemy_tile, player_tile)
+        if tile_path:
+            return tile_path
+        
+        return (yield from self._a_star_pathfind_steps(enemy_tile, player_tile, self.chase_path_length, False, "jps"))
+    
+    def _inspect_pathfind(self, enemy_pos, target, tile_size=16):
+        """JPS path to the investigation target, or to a walkable tile near it if the target is
+        unreachable. Returns None while the request waits in the path scheduler"""
+        enemy_tile = (int(enemy_pos.x // tile_size), int(enemy_pos.y // tile_size))
+        target_tile = (int(target.x // tile_size), int(target.y // tile_size))
+        
+        goal_tiles = (target_tile,)
+        if self.enemy.path_workers is not None:
+            # workers can't call back into this enemy, so hand them the nearby fallback tile up front
+            walkable_target = self._find_walkable_position_near(target)
+            if walkable_target:
+                goal_tiles += ((int(walkable_target.x // tile_size), int(walkable_target.y // tile_size)),)
+        job = ("jps", enemy_tile, goal_tiles, self.inspect_path_length)
+        cache_key = (enemy_tile, target_tile, ("inspect", self.inspect_path_length))
+        tile_path = self._request_path(("inspect", target_tile), lambda: self._inspect_pathfind_steps(enemy_tile, target), job, cache_key)
+        if tile_path is None:
+            return None
+        return self._tiles_to_positions(tile_path, tile_size)
+    
+    def _inspect_pathfind_steps(self, enemy_tile, target, tile_size=16):
+        """Resumable body of _inspect_pathfind, returns a tile path"""
+        target_tile = (int(target.x // tile_size), int(target.y // tile_size))
+        tile_path = yield from self._a_star_pathfind_steps(enemy_tile, target_tile, self.inspect_path_length, False, "jps")
+        
+        # If A* fails, try to find a walkable position near the target
+        if not tile_path:
+            walkable_target = self._find_walkable_position_near(target)
+            if walkable_target:
+                walkable_tile = (int(walkable_target.x // tile_size), int(walkable_target.y // tile_size))
+                tile_path = yield from self._a_star_pathfind_steps(enemy_tile, walkable_tile, self.inspect_path_length, False, "jps")
+                print(f"Enemy: Original target unreachable, investigating nearby position instead")
+            else:
+                print(f"Enemy: Cannot find path to investigation target, using direct movement")
+        return tile_path
+    
+    def _request_path(self, key, make_steps, job, cache_key=None, scheduled=True):
+        """Run a path search through the enemy's PathWorkerPool or PathScheduler, or right away
+        if it has neither (or scheduled is False)
         
-        if debug:
-            print(f"A* failed to find path after expanding {nodes_expanded} nodes")
-        return []
+        Args:
+            key: What is being asked for; a new key replaces this enemy's queued request
+            make_steps: Function returning the search generator (scheduler / in-place search)
+            job: (method, start_tile, goal_tiles, max_path_length) for the worker pool
+            cache_key: (start_tile, goal_tile, cost profile) if the result can go in the shared
+                       PathCache; None for searches that depend on more than that (chase)
+            scheduled: False runs the search right here even if a scheduler or pool exists
+        
+        Returns:
+            list: Tile path, or None while the search is still queued or running
+        """
+        cache = self.enemy.path_cache if cache_key is not None else None
+        if cache is not None:
+            tile_path = cache.get(cache_key)
+            if tile_path is not None:
+                return tile_path
+        
+        queue = None
+        if scheduled:
+            workers = self.enemy.path_workers
+            # a search the pool couldn't solve goes to the in-process scheduler
+            queue = workers if workers is not None and workers.accepts(self, key) else self.enemy.path_scheduler
+        if queue is None:
+            tile_path = run_search(make_steps())
+            if cache is not None and tile_path is not None:
+                cache.put(cache_key, tile_path)
+            return tile_path
+        
+        # a new search starts from this call's start tile; a queued one keeps the tile it
+        # was submitted with even if the enemy has moved on since
+        if not queue.has_request(self, key):
+            self.queued_cache_key = (cache_key, self.enemy.nav_grid.version)
+        if queue is self.enemy.path_workers:
+            tile_path = queue.request(self, key, job)
+        else:
+            # closest chasers first, everything that isn't a chase after them
+            player_pos = pygame.Vector2(self.enemy.player_ref.rect.center)
+            priority = self.enemy.position.distance_to(player_pos)
+            if self.enemy.state != "chase":
+                priority += 10000
+            tile_path = queue.request(self, key, make_steps, priority)
+        
+        if tile_path is not None and self.queued_cache_key is not None:
+            submitted_key, submitted_version = self.queued_cache_key
+            self.queued_cache_key = None
+            # searched before a door changed the map: don't file it under the new version
+            if cache is not None and submitted_key is not None and submitted_version == self.enemy.nav_grid.version:
+                cache.put(submitted_key, tile_path)
+        return tile_path
+    
+    def _tiles_to_positions(self, tile_path, tile_size=16):
+        """Tile path -> list of tile-center Vector2 waypoints, string-pulled from the enemy's
+        current position down to the corners when smooth_paths is on"""
+        waypoints = [pygame.Vector2(tile_x * tile_size + tile_size // 2, tile_y * tile_size + tile_size // 2)
+                     for tile_x, tile_y in tile_path]
+        if self.smooth_paths:
+            waypoints = smooth_path(self.enemy.nav_grid, pygame.Vector2(self.enemy.position), waypoints)
+        return waypoints
     
     # TODO: create set patrol paths depending on their spawn position instead of random
     def patrol(self):
@@ -117,7 +216,8 @@ class EnemyBehaviors:
         
         # If no patrol path, use the predefined patrol path
         if not self.enemy.path:
-            self._set_next_patrol_point(use_pathfinding=use_pathfinding)
+            if not self._set_next_patrol_point(use_pathfinding=use_pathfinding):
+                return  # return path still queued in the path scheduler
             # Clear the flag after using it
             if hasattr(self.enemy, '_returning_to_patrol'):
                 delattr(self.enemy, '_returning_to_patrol')
@@ -147,37 +247,9 @@ class EnemyBehaviors:
 
     def _get_tile_weight(self, grid_x, grid_y):
         """Tile weight helper func for A* 
-        Get movement cost for a tile position using fast lookup dictionaries AND collision rects"""
-        # Import the fast lookup function from tiles module
-        from tiles import get_tile_weight_fast
-        
-        # First check the tile-based wall system
-        tile_weight = get_tile_weight_fast(self.enemy.wall_tiles, self.enemy.slow_tiles, grid_x, grid_y)
-        
-        # If already marked as wall from tile properties, return infinite weight
-        if tile_weight == float('inf'):
-            return float('inf')
-        
-        # Additionally check collision rectangles to catch walls that aren't marked with 'wall' property
-        tile_size = 16
-        tile_center_x = grid_x * tile_size + tile_size // 2
-        tile_center_y = grid_y * tile_size + tile_size // 2
-        
-        # Create a small rect representing the tile center for collision testing
-        # Use a smaller rect to avoid false positives on tile edges
-        test_rect = pygame.Rect(
-            tile_center_x - tile_size // 4,
-            tile_center_y - tile_size // 4,
-            tile_size // 2,
-            tile_size // 2
-        )
-        
-        # Check if this tile position collides with any collision rectangles
-        for collision_rect in self.enemy.collision_rects:
-            if test_rect.colliderect(collision_rect):
-                return float('inf')  # Treat collision areas as walls
-        
-        return tile_weight
+        Get movement cost for a tile position from the shared nav grid
+        (walls, slow tiles and collision rects are already baked in at load time)"""
+        return self.enemy.nav_grid.cost(grid_x, grid_y)
 
     def _is_stuck(self, current_pos):
         """Detect if enemy is stuck (not moving for a while)"""
@@ -296,59 +368,38 @@ class EnemyBehaviors:
         # Only recalculate path if:
         # 1. Cooldown has passed AND
         # 2. (Player moved significantly OR no current path OR path is nearly complete OR enemy is stuck)
+        cooldown = self.incremental_pathfind_cooldown if self.chase_planner is not None else self.pathfind_cooldown
         should_recalculate = (
-            current_time - self.prev_pathfind_length >= self.pathfind_cooldown and
+            current_time - self.prev_pathfind_length >= cooldown and
             (player_moved_significantly or not self.current_path or len(self.current_path) <= 2 or is_stuck)
         )
         
         if should_recalculate:
+            new_path = None
             # If player is very close but enemy is stuck, find intermediate waypoint first
             if player_very_close and is_stuck:
                 intermediate_waypoint = self._find_intermediate_waypoint(enemy_pos, player_pos)
                 if intermediate_waypoint:
-                    # Try pathfinding to intermediate waypoint first
+                    # Short hop, cheap enough to search right away
                     new_path = self._a_star_pathfind(enemy_pos, intermediate_waypoint)
-                    if new_path:
-                        self.current_path = new_path
-                        self.prev_pathfind_length = current_time
-                        self.last_player_position = player_pos.copy()
-                        self.stuck_timer = 0.0  # Reset stuck timer
-                    else:
-                        # Try direct pathfind to player as fallback
-                        new_path = self._a_star_pathfind(enemy_pos, player_pos)
-                        if new_path:
-                            self.current_path = new_path
-                            self.prev_pathfind_length = current_time
-                            self.last_player_position = player_pos.copy()
-                        else:
-                            self._move_directly_to_target(player_pos, enemy_pos)
-                            return
-                else:
-                    # No intermediate waypoint found, try direct pathfind
-                    new_path = self._a_star_pathfind(enemy_pos, player_pos)
-                    if new_path:
-                        self.current_path = new_path
-                        self.prev_pathfind_length = current_time
-                        self.last_player_position = player_pos.copy()
-                    else:
-                        self._move_directly_to_target(player_pos, enemy_pos)
-                        return
-            else:
-                # Normal pathfinding
-                new_path = self._a_star_pathfind(enemy_pos, player_pos)
-                
-                # If A* succeeds, use the new path
-                if new_path:
-                    self.current_path = new_path
-                    self.prev_pathfind_length = current_time
-                    self.last_player_position = player_pos.copy()
-                    if is_stuck:
-                        self.stuck_timer = 0.0  # Reset stuck timer
-                else:
-                    # Fallback: if A* fails, use direct movement with some avoidance
-                    self._move_directly_to_target(player_pos, enemy_pos)
-                    # Don't update the timer so we'll try A* again sooner
-                    return
+            
+            # Normal pathfinding (also the fallback when there's no usable waypoint)
+            if not new_path:
+                new_path = self._chase_pathfind(enemy_pos, player_pos)
+            
+            # If A* succeeds, use the new path
+            if new_path:
+                self.current_path = new_path
+                self.prev_pathfind_length = current_time
+                self.last_player_position = player_pos.copy()
+                if is_stuck:
+                    self.stuck_timer = 0.0  # Reset stuck timer
+            elif new_path is not None:
+                # Fallback: if A* fails, use direct movement with some avoidance
+                self._move_directly_to_target(player_pos, enemy_pos)
+                # Don't update the timer so we'll try A* again sooner
+                return
+            # else the request is still queued in the path scheduler - keep following the current path
         
         # If we have a path, follow it; otherwise fall back to direct movement
         if self.current_path:
@@ -501,17 +552,11 @@ class EnemyBehaviors:
             if (not self.current_path or 
                 current_time - getattr(self, 'last_inspect_pathfind', 0) > 2000):  # Recalculate every 2 seconds
                 
-                self.current_path = self._a_star_pathfind(enemy_pos, target, max_path_length=35)
-                self.last_inspect_pathfind = current_time
-                
-                # If A* fails, try to find a walkable position near the target
-                if not self.current_path:
-                    walkable_target = self._find_walkable_position_near(target)
-                    if walkable_target:
-                        self.current_path = self._a_star_pathfind(enemy_pos, walkable_target, max_path_length=35)
-                        print(f"Enemy: Original target unreachable, investigating nearby position instead")
-                    else:
-                        print(f"Enemy: Cannot find path to investigation target, using direct movement")
+                new_path = self._inspect_pathfind(enemy_pos, target)
+                # None = still queued in the path scheduler, keep following the old path meanwhile
+                if new_path is not None:
+                    self.current_path = new_path
+                    self.last_inspect_pathfind = current_time
             
             # Follow the path if we have one
             if self.current_path:
@@ -566,9 +611,11 @@ class EnemyBehaviors:
         
         # Return to patrol after camping for 10 seconds
         if self.enemy.total_camp_time > 10.0:
+            # Head back to the start of the patrol route; patrol() requests the return path
             if hasattr(self.enemy, 'patrol_path_pixels') and self.enemy.patrol_path_pixels:
-                patrol_start = pygame.Vector2(self.enemy.patrol_path_pixels[0])
-                self.current_path = self._a_star_pathfind(self.enemy.position, patrol_start)
+                self.enemy.patrol_index = 0
+                self.enemy.path = []
+                self.enemy._returning_to_patrol = True
             
             self.enemy.state = "patrol"
             # Clear camp variables
@@ -604,10 +651,11 @@ class EnemyBehaviors:
             self.enemy.distraction_position = None
     
     def _shoot_at_player(self):
-        """Create a bullet projectile aimed at the player"""
-        # Import here to avoid circular imports
-        from bottle import BulletProjectile
+        """Aim a bullet at the player
         
+        Returns:
+            tuple: (start position, direction, speed) for ProjectileManager.spawn_bullet
+        """
         # Calculate direction to aim at player
         player_pos = pygame.Vector2(self.enemy.player_ref.rect.center)
         enemy_pos = pygame.Vector2(self.enemy.position)
@@ -616,14 +664,7 @@ class EnemyBehaviors:
         # Determine the closest cardinal direction
         direction = get_closest_cardinal_direction(direction_vector)
         
-        # Create bullet projectile
-        bullet = BulletProjectile(
-            start_pos=self.enemy.position.copy(),
-            direction=direction,
-            speed=self.enemy.bullet_speed
-        )
-        
-        return bullet
+        return (self.enemy.position.x, self.enemy.position.y), direction, self.enemy.bullet_speed
     
     def _set_next_patrol_point(self, use_pathfinding=False):
         """Set the next patrol point as the current path destination
@@ -631,6 +672,9 @@ class EnemyBehaviors:
         Args:
             use_pathfinding: If True, use A* pathfinding to reach the patrol point.
                            If False, use direct movement (normal patrol behavior)
+        
+        Returns:
+            bool: False while the return path is still queued in the path scheduler
         """
         if hasattr(self.enemy, 'patrol_path_pixels') and self.enemy.patrol_path_pixels:
             next_point = self.enemy.patrol_path_pixels[self.enemy.patrol_index]
@@ -641,7 +685,10 @@ class EnemyBehaviors:
                 enemy_pos = pygame.Vector2(self.enemy.position)
                 
                 # Use A* pathfinding to get to the next patrol point
-                self.current_path = self._a_star_pathfind(enemy_pos, next_point_vec, max_path_length=50)
+                new_path = self._a_star_pathfind(enemy_pos, next_point_vec, max_path_length=self.return_path_length, method="jps", scheduled=True)
+                if new_path is None:
+                    return False
+                self.current_path = new_path
                 
                 if self.current_path:
                     # Convert A* path to the format expected by enemy.path
@@ -657,6 +704,7 @@ class EnemyBehaviors:
         else:
             # Fallback to a default point if no patrol path is set
             self.enemy.path = [(self.enemy.position.x + 32, self.enemy.position.y)]
+        return True
 
     def _advance_patrol_index(self):
         """Move to the next point in the patrol path, wrapping around if necessary"""
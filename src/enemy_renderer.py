@@ -16,31 +16,14 @@ class EnemyRenderer:
         # Calculate the angle of the facing direction
         facing_angle = math.degrees(math.atan2(facing_direction.y, facing_direction.x))
         
-        # Calculate cone boundaries
-        half_cone_angle = self.enemy.vision_cone_angle / 2
-        start_angle = facing_angle - half_cone_angle
-        end_angle = facing_angle + half_cone_angle
-        
         # Get the actual camera position from the map layer
         camera_x, camera_y = self._get_camera_position(map_layer)
         
-        # Calculate enemy's screen position using the actual camera position
-        enemy_screen_x = self.enemy.position.x - camera_x
-        enemy_screen_y = self.enemy.position.y - camera_y
-        
-        # Create points for the vision cone polygon
-        points = [(enemy_screen_x, enemy_screen_y)]  # Start at enemy position
-        
-        # Add points along the arc of the vision cone
-        num_arc_points = 20
-        for i in range(num_arc_points + 1):
-            angle = start_angle + (end_angle - start_angle) * (i / num_arc_points)
-            angle_rad = math.radians(angle)
-            
-            # Calculate point on the edge of the sight range
-            point_x = enemy_screen_x + self.enemy.sight_range * math.cos(angle_rad)
-            point_y = enemy_screen_y + self.enemy.sight_range * math.sin(angle_rad)
-            points.append((point_x, point_y))
+        # Points along the arc of the vision cone, cut short where walls block the enemy's field of view
+        self.enemy.fov.update(self.enemy.position)
+        points = [(point_x - camera_x, point_y - camera_y)
+                  for point_x, point_y in self.enemy.fov.cone_points(self.enemy.position, facing_angle,
+                                                                     self.enemy.vision_cone_angle, self.enemy.sight_range)]
         
         # Create a surface with per-pixel alpha for the vision cone
         cone_surface = pygame.Surface(screen.get_size(), pygame.SRCALPHA)
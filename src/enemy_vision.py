@@ -0,0 +1,108 @@
+"""
+Batched sight range and vision cone tests for every enemy
+"""
+import math
+import pygame
+
+
+FACING_VECTORS = {"down": (0, 1), "up": (0, -1), "left": (-1, 0), "right": (1, 0)}
+
+# where the player is relative to an enemy's view, before line of sight
+OUT_OF_RANGE = 0
+OUT_OF_CONE = 1
+IN_CONE = 2
+ON_TOP = 3  # closer than 0.1px, seen regardless of facing
+
+
+def in_cone(offset_x, offset_y, facing_x, facing_y, cos_half):
+    """True if the offset is within the cone around the (unit) facing vector, without trig or sqrt
+
+    Same as angle(offset, facing) <= half angle, i.e. dot >= cos_half * length, squared
+    so the length never has to be taken.
+    """
+    dot = offset_x * facing_x + offset_y * facing_y
+    threshold = cos_half * cos_half * (offset_x * offset_x + offset_y * offset_y)
+    if cos_half >= 0:
+        return dot >= 0 and dot * dot >= threshold
+    return dot >= 0 or dot * dot <= threshold
+
+
+class EnemyVision:
+    """Range and cone tests for all enemies against the player and every book, once per frame
+
+    EnemySensors.check_sight asks for its enemy's candidates; the first ask in
+    a frame runs the tests for every enemy in one pass (plain distance squared
+    and in_cone, no atan2 or normalize), and the sensors only cast line of
+    sight rays for what survives. Each enemy checks before it moves, so the
+    positions and facings read by the pass are the ones it would have used.
+    Books come from the ItemRegistry cells around each enemy, so the pass
+    doesn't grow with the number of items on the map.
+    """
+
+    def __init__(self, enemies, player, items_group):
+        self.enemies = enemies
+        self.player = player
+        self.items_group = items_group
+        self.results = None  # enemy -> (player state, book candidates), for the current frame
+
+    def new_frame(self):
+        """Drop last frame's results (call once per frame, before the enemies update)"""
+        self.results = None
+
+    def candidates(self, enemy):
+        """(player state, book candidates) for enemy this frame; see scan"""
+        if self.results is None or enemy not in self.results:
+            self.results = self.scan(self.enemies, self.player, self.items_group)
+        return self.results[enemy]
+
+    @staticmethod
+    def scan(enemies, player, items_group):
+        """Run the range and cone tests for each enemy
+
+        Returns:
+            dict: enemy -> (player state, books), where player state is one of
+            OUT_OF_RANGE / OUT_OF_CONE / IN_CONE / ON_TOP and books lists
+            (center, on_top) for the books in range and in the cone (or on top
+            of the enemy), in items_group order
+        """
+        player_x, player_y = player.rect.center
+        cos_by_angle = {}
+        search_area = pygame.Rect(0, 0, 0, 0)
+        results = {}
+        for enemy in enemies:
+            enemy_x, enemy_y = enemy.position
+            facing_x, facing_y = FACING_VECTORS.get(enemy.animator.current_direction, (0, 1))
+            range_squared = enemy.sight_range * enemy.sight_range
+            cos_half = cos_by_angle.get(enemy.vision_cone_angle)
+            if cos_half is None:
+                cos_half = cos_by_angle[enemy.vision_cone_angle] = math.cos(math.radians(enemy.vision_cone_angle / 2))
+
+            # books whose center can be in range have a rect overlapping the square around it
+            reach = int(enemy.sight_range) + 1
+            search_area.update(int(enemy_x) - reach, int(enemy_y) - reach, 2 * reach + 1, 2 * reach + 1)
+            books = items_group.query(search_area, ('book',)) if items_group is not None else ()
+
+            visible_books = []
+            for book in books:
+                book_x, book_y = book.rect.center
+                offset_x, offset_y = book_x - enemy_x, book_y - enemy_y
+                distance_squared = offset_x * offset_x + offset_y * offset_y
+                if distance_squared > range_squared:
+                    continue
+                if distance_squared < 0.01:
+                    visible_books.append(((book_x, book_y), True))
+                elif in_cone(offset_x, offset_y, facing_x, facing_y, cos_half):
+                    visible_books.append(((book_x, book_y), False))
+
+            offset_x, offset_y = player_x - enemy_x, player_y - enemy_y
+            distance_squared = offset_x * offset_x + offset_y * offset_y
+            if distance_squared > range_squared:
+                player_state = OUT_OF_RANGE
+            elif distance_squared < 0.01:
+                player_state = ON_TOP
+            elif in_cone(offset_x, offset_y, facing_x, facing_y, cos_half):
+                player_state = IN_CONE
+            else:
+                player_state = OUT_OF_CONE
+            results[enemy] = (player_state, visible_books)
+        return results
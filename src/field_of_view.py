@@ -0,0 +1,129 @@
+"""
+Recursive shadowcasting field of view on the tile grid, shared by enemy sensors and rendering
+"""
+import math
+from nav_grid import BLOCKED
+from sight_grid import CLEAR
+
+
+# (xx, xy, yx, yy) transforms mapping the first octant onto each of the eight
+OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+
+class FieldOfView:
+    """Tiles one enemy can see, cast from the tile it stands on
+
+    Walls (tiles the nav grid blocks that a collider actually reaches into)
+    cast shadows; the walls themselves are visible. The field is cast all
+    the way around and only recomputed when the enemy reaches a new tile or
+    a lock door changes the map, so turning costs nothing: the vision cone
+    is applied on top (EnemyVision for targets, cone_points for drawing).
+    Sensors only cast exact line of sight rays to targets on visible tiles,
+    and the renderer draws the cone clipped to the same tiles, so what is
+    drawn is what can be seen.
+    """
+
+    def __init__(self, nav_grid, sight_grid, sight_range):
+        self.nav_grid = nav_grid
+        self.sight_grid = sight_grid
+        tile_size = nav_grid.tile_size
+        # a target sight_range away can sit up to one tile further from the origin tile's center
+        self.radius = math.ceil((sight_range + tile_size) / tile_size)
+        self.visible_tiles = set()
+        self.key = None  # (origin tile, nav version, sight version) the field was cast for
+        self.compute_count = 0
+
+    def update(self, position):
+        """Recast the field if the enemy at position (pixels) is on a new tile or the map changed"""
+        tile_size = self.nav_grid.tile_size
+        origin = (int(position[0] // tile_size), int(position[1] // tile_size))
+        key = (origin, self.nav_grid.version, self.sight_grid.version)
+        if key != self.key:
+            self.key = key
+            self.visible_tiles = self._cast(*origin)
+            self.compute_count += 1
+
+    def can_see_tile(self, tile):
+        return tile in self.visible_tiles
+
+    def is_opaque(self, tile_x, tile_y):
+        """Walls block sight; off the map counts as wall"""
+        nav_grid = self.nav_grid
+        if not nav_grid.in_bounds(tile_x, tile_y):
+            return True
+        index = tile_y * nav_grid.width + tile_x
+        return nav_grid.costs[index] == BLOCKED and self.sight_grid.opacity[index] != CLEAR
+
+    def _cast(self, origin_x, origin_y):
+        visible = {(origin_x, origin_y)}
+        for transform in OCTANTS:
+            self._cast_octant(origin_x, origin_y, 1, 1.0, 0.0, transform, visible)
+        return visible
+
+    def _cast_octant(self, origin_x, origin_y, row, start_slope, end_slope, transform, visible):
+        """Scan one octant row by row from row outwards between two slopes (Bjorn Bergstrom's algorithm)"""
+        if start_slope < end_slope:
+            return
+        xx, xy, yx, yy = transform
+        radius = self.radius
+        radius_squared = radius * radius
+        is_opaque = self.is_opaque
+        next_start = start_slope
+        for distance in range(row, radius + 1):
+            blocked = False
+            delta_y = -distance
+            for delta_x in range(-distance, 1):
+                # slopes of the tile's left and right edges as seen from the origin
+                left_slope = (delta_x - 0.5) / (delta_y + 0.5)
+                right_slope = (delta_x + 0.5) / (delta_y - 0.5)
+                if start_slope < right_slope:
+                    continue
+                if end_slope > left_slope:
+                    break
+
+                tile_x = origin_x + delta_x * xx + delta_y * xy
+                tile_y = origin_y + delta_x * yx + delta_y * yy
+                if delta_x * delta_x + delta_y * delta_y <= radius_squared:
+                    visible.add((tile_x, tile_y))
+
+                opaque = is_opaque(tile_x, tile_y)
+                if blocked:
+                    if opaque:
+                        next_start = right_slope
+                        continue
+                    blocked = False
+                    start_slope = next_start
+                elif opaque and distance < radius:
+                    # a wall: scan the still-lit part beyond it, then continue past its shadow
+                    blocked = True
+                    self._cast_octant(origin_x, origin_y, distance + 1, start_slope, left_slope, transform, visible)
+                    next_start = right_slope
+            if blocked:
+                break
+
+    def cone_points(self, position, facing_angle, cone_angle, sight_range, arc_points=20, step=4):
+        """Outline of the vision cone clipped to the visible tiles (pixels, starting at position)
+
+        Each arc ray is walked in step-pixel increments and stops where it
+        enters a wall or a tile outside the field.
+        """
+        tile_size = self.nav_grid.tile_size
+        visible_tiles = self.visible_tiles
+        start_x, start_y = position
+        points = [(start_x, start_y)]
+        start_angle = facing_angle - cone_angle / 2
+        for index in range(arc_points + 1):
+            angle = math.radians(start_angle + cone_angle * index / arc_points)
+            direction_x, direction_y = math.cos(angle), math.sin(angle)
+            reach = 0.0
+            while reach < sight_range:
+                ahead = min(reach + step, sight_range)
+                tile = (int((start_x + direction_x * ahead) // tile_size), int((start_y + direction_y * ahead) // tile_size))
+                if tile not in visible_tiles or self.is_opaque(*tile):
+                    break
+                reach = ahead
+            points.append((start_x + direction_x * reach, start_y + direction_y * reach))
+        return points
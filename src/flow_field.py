@@ -0,0 +1,143 @@
+"""
+Shared Dijkstra flow field toward a single moving target (the player during chase)
+"""
+import heapq
+from nav_grid import BLOCKED
+from pathfinding import DIAGONAL_COST, DIRECTIONS, run_search
+
+
+# rebuilds yield to the caller (a PathScheduler slice) after this many heap pops
+SLICE_POPS = 64
+
+
+class FlowField:
+    """Per-tile next step toward a target tile, shared by every chasing enemy
+
+    The field is a reverse Dijkstra from the target over the whole nav grid, so
+    any enemy anywhere on the map can read its route with a few index lookups.
+    It is only rebuilt when asked for a different target tile, i.e. at most
+    once per player tile change no matter how many enemies are chasing.
+    The rebuild is a generator (update_steps) so the PathScheduler can spread
+    it over frames like any other search; the previous field stays readable
+    until the new one is finished.
+    """
+
+    def __init__(self, nav_grid):
+        self.nav_grid = nav_grid
+        self.target_tile = None
+        self.built_version = nav_grid.version
+        size = nav_grid.width * nav_grid.height
+        self.distance = [float('inf')] * size
+        self.next_index = [-1] * size  # -1 = no route (or the target itself)
+        self.rebuild_count = 0
+        # rebuild in progress, shared by every caller asking for the same field
+        self.pending_key = None  # (target tile, nav grid version) it is for
+        self.pending_steps = None
+
+    def update(self, target_tile):
+        """Make sure the field points at target_tile, rebuilding only if it moved (or the map changed)"""
+        run_search(self.update_steps(target_tile))
+
+    def update_steps(self, target_tile):
+        """Resumable update: yields between slices of the rebuild until the field points at target_tile
+
+        Every chaser advances the same rebuild. One asking for a newer target
+        first helps finish the rebuild in progress (so a player who keeps
+        moving can't starve the field), then starts its own; a door changing
+        the map throws the one in progress away.
+        """
+        while target_tile != self.target_tile or self.built_version != self.nav_grid.version:
+            if self.pending_steps is None or self.pending_key[1] != self.nav_grid.version:
+                self.pending_key = (target_tile, self.nav_grid.version)
+                self.pending_steps = self._rebuild_steps(target_tile)
+            try:
+                next(self.pending_steps)
+            except StopIteration:
+                self.pending_key = self.pending_steps = None
+                continue
+            yield
+
+    def _rebuild_steps(self, target_tile):
+        grid = self.nav_grid
+        width = grid.width
+        height = grid.height
+        costs = grid.costs
+        size = width * height
+        version = grid.version
+
+        distance = [float('inf')] * size
+        next_index = [-1] * size
+
+        heap = []
+        if grid.in_bounds(*target_tile):
+            target = target_tile[1] * width + target_tile[0]
+            distance[target] = 0
+            heap.append((0, target))
+
+        pops = 0
+        while heap:
+            pops += 1
+            if pops % SLICE_POPS == 0:
+                yield
+            current_distance, current = heapq.heappop(heap)
+            if current_distance > distance[current]:
+                continue
+            current_x = current % width
+            current_y = current // width
+            # every neighbor steps *into* current, so it pays current's cost
+            step_cost = costs[current]
+            if step_cost == BLOCKED:
+                step_cost = 1  # target inside a wall (player hugging one): still flow toward it
+
+            for step_x, step_y in DIRECTIONS:
+                neighbor_x = current_x + step_x
+                neighbor_y = current_y + step_y
+                if neighbor_x < 0 or neighbor_x >= width or neighbor_y < 0 or neighbor_y >= height:
+                    continue
+                neighbor = neighbor_y * width + neighbor_x
+                if costs[neighbor] == BLOCKED:
+                    continue
+
+                move_cost = step_cost
+                if step_x != 0 and step_y != 0:
+                    # no corner cutting so agents don't clip thru walls
+                    if (costs[current_y * width + neighbor_x] == BLOCKED or
+                            costs[neighbor_y * width + current_x] == BLOCKED):
+                        continue
+                    move_cost *= DIAGONAL_COST
+
+                new_distance = current_distance + move_cost
+                if new_distance < distance[neighbor]:
+                    distance[neighbor] = new_distance
+                    next_index[neighbor] = current
+                    heapq.heappush(heap, (new_distance, neighbor))
+
+        self.target_tile = target_tile
+        self.built_version = version
+        self.distance = distance
+        self.next_index = next_index
+        self.rebuild_count += 1
+
+    def next_step(self, tile_x, tile_y):
+        """Next tile toward the target from (tile_x, tile_y), or None if there is no route"""
+        if not self.nav_grid.in_bounds(tile_x, tile_y):
+            return None
+        index = self.next_index[tile_y * self.nav_grid.width + tile_x]
+        if index < 0:
+            return None
+        return index % self.nav_grid.width, index // self.nav_grid.width
+
+    def path_from(self, start_tile, max_steps=None):
+        """Follow the field from start_tile, returning tiles up to the target (same format as a_star)"""
+        width = self.nav_grid.width
+        if not self.nav_grid.in_bounds(*start_tile):
+            return []
+        index = start_tile[1] * width + start_tile[0]
+        limit = max_steps if max_steps is not None else len(self.next_index)
+        path = []
+        while len(path) < limit:
+            index = self.next_index[index]
+            if index < 0:
+                break
+            path.append((index % width, index // width))
+        return path
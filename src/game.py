@@ -2,8 +2,20 @@ import pygame
 import player
 import tiles
 import pyscroll
-from bottle import BottleProjectile, BulletProjectile
+from projectiles import ProjectileManager
 from enemy import Enemy
+from enemy_vision import EnemyVision
+from item_registry import ItemRegistry
+from nav_grid import NavGrid
+from terrain import WALL
+from sight_grid import SightGrid
+from sight_cache import SightCache
+from visibility_table import VisibilityTable
+from hierarchical_pathfinding import HierarchicalPathfinder
+from flow_field import FlowField
+from path_scheduler import PathScheduler
+from path_workers import PathWorkerPool
+from path_cache import PathCache
 from sound_system import sound_system
 
 # INITIALIZATIONS ====================================================================================================================================
@@ -32,13 +44,40 @@ locker_open_sprite = pygame.image.load('data/sprites/locker_open.png').convert_a
 # delta time, used for frame-rate independent physics
 dt = 0
 
-# load tileset and create pyscroll map
-tmx_data, map_data, collision_rects, items_data, wall_tiles, slow_tiles = tiles.load_tileset('data/tmx/untitled.tmx', 16)
+# Lock wall tile positions (defined by user requirements)
+lock1_wall_tiles = [(64, 69), (64, 70), (64, 71), (49, 81), (50, 81), (51, 81), (23, 82), (24, 82), (25, 82)]
+lock2_wall_tiles = [(65, 69), (65, 70), (65, 71), (49, 82), (50, 82), (51, 82)]
+
+# load tileset and create pyscroll map (lock walls keep their own rects so they can be removed)
+tmx_data, map_data, collision_world, items_data, terrain = tiles.load_tileset(
+    'data/tmx/untitled.tmx', 16, keep_separate_tiles=lock1_wall_tiles + lock2_wall_tiles)
 
 # Get map dimensions for pathfinding bounds
 map_width = tmx_data.width
 map_height = tmx_data.height
 
+# build the navigation cost grid once and share it between all enemies
+nav_grid = NavGrid(map_width, map_height, 16, terrain, collision_world)
+# cluster the grid for long-range (hierarchical) pathfinding
+path_hierarchy = HierarchicalPathfinder(nav_grid)
+# one flow field toward the player, shared by every chasing enemy
+chase_flow_field = FlowField(nav_grid)
+# enemies queue their path searches here, run() spends at most budget_ms on them per frame
+path_scheduler = PathScheduler(budget_ms=2.0)
+# opt-in: solve A*/JPS/HPA* requests in worker processes instead (multi-core machines)
+USE_PATH_WORKERS = False
+path_workers = PathWorkerPool(nav_grid) if USE_PATH_WORKERS and PathWorkerPool.is_supported() else None
+# repeat queries (patrol returns, inspect targets) come out of here until the map changes
+path_cache = PathCache(nav_grid)
+# which tiles block sight, so line of sight checks walk tiles instead of pixels
+sight_grid = SightGrid(collision_world, map_width, map_height)
+# optional: precomputed tile-to-tile visibility so most sight checks are a bit test (cached to disk)
+USE_VISIBILITY_TABLE = True
+if USE_VISIBILITY_TABLE:
+    sight_grid.visibility_table = VisibilityTable.load_or_build(sight_grid, 60, 'data/tmx/untitled.pvs')  # 60 = Enemy.sight_range
+# repeat sight checks between the same pixels come out of here until a door changes the map
+sight_cache = SightCache(sight_grid)
+
 # create the scrolling map layer
 map_layer = pyscroll.BufferedRenderer(
     data=map_data,
@@ -48,14 +87,11 @@ map_layer = pyscroll.BufferedRenderer(
 # create the pyscroll group (like a camera)
 camera_group = pyscroll.PyscrollGroup(map_layer=map_layer, default_layer=1)
 
-# create item sprites group
-items_group = pygame.sprite.Group()
-
-# create bottle projectiles group
-bottle_projectiles_group = pygame.sprite.Group()
+# create item sprites group (indexed by kind and tile for overlap, pickup and sight queries)
+items_group = ItemRegistry()
 
-# create bullet projectiles group
-bullet_projectiles_group = pygame.sprite.Group()
+# thrown bottles and enemy bullets (sprites are only made for the ones on screen)
+projectiles = ProjectileManager()
 
 # create enemies group
 enemies_group = pygame.sprite.Group()
@@ -107,9 +143,15 @@ enemy_spawn_positions = [
     (tile[0] * 16 + 8, tile[1] * 16 + 8) for tile in enemy_spawn_tiles
 ]
 
+# range and vision cone tests for every enemy, batched once per frame
+enemy_vision = EnemyVision(enemies_group, game_player, items_group)
+
 for i, enemy_pos in enumerate(enemy_spawn_positions):
     patrol_path = enemy_patrol_paths[i] if i < len(enemy_patrol_paths) else enemy_patrol_paths[0]
-    enemy = Enemy(enemy_pos, game_player, collision_rects, patrol_path, items_group, wall_tiles, slow_tiles, map_width, map_height)
+    enemy = Enemy(enemy_pos, game_player, collision_world, patrol_path, items_group, terrain, map_width, map_height,
+                  nav_grid=nav_grid, path_hierarchy=path_hierarchy, chase_flow_field=chase_flow_field,
+                  path_scheduler=path_scheduler, path_workers=path_workers, path_cache=path_cache,
+                  sight_grid=sight_grid, vision=enemy_vision, sight_cache=sight_cache)
     enemies_group.add(enemy)
     # add enemy to camera group on layer 1 (above items, below player)
     camera_group.add(enemy, layer=1)
@@ -127,9 +169,6 @@ game_won = False  # Track if the game was won
 original_items_data = items_data.copy()
 removed_items = []  # Track removed items for respawning on death
 
-# Lock wall tile positions (defined by user requirements)
-lock1_wall_tiles = [(64, 69), (64, 70), (64, 71), (49, 81), (50, 81), (51, 81), (23, 82), (24, 82), (25, 82)]
-lock2_wall_tiles = [(65, 69), (65, 70), (65, 71), (49, 82), (50, 82), (51, 82)]
 removed_wall_tiles = []  # Track removed wall tiles for respawning on death
 
 # HELPER FUNCTIONS ================================================================================================================================
@@ -142,18 +181,20 @@ def remove_wall_tile(tile_pos):
     world_x = tile_x * 16
     world_y = tile_y * 16
     
-    # Find and remove from collision_rects - check for any rect that overlaps with this tile position
-    global collision_rects
-    original_count = len(collision_rects)
-    collision_rects = [rect for rect in collision_rects if not (
-        rect.x <= world_x < rect.x + rect.width and 
-        rect.y <= world_y < rect.y + rect.height
-    )]
-    removed_count = original_count - len(collision_rects)
-    print(f"Removed {removed_count} collision rects for tile at ({tile_x}, {tile_y})")
+    # Remove the tile's collision rects from the shared collision world (lock walls were
+    # loaded under their tile handle, so this only touches this tile's rects)
+    removed_rects = collision_world.remove_tile((tile_x, tile_y))
+    print(f"Removed {len(removed_rects)} collision rects for tile at ({tile_x}, {tile_y})")
     
-    # Store for respawning
-    removed_wall_tiles.append((tile_x, tile_y, world_x, world_y))  # Store both tile and world coords
+    # Open the tile in the nav grid so enemy planners can path through the door
+    was_wall = terrain.is_wall(tile_x, tile_y)
+    if was_wall:
+        terrain.set_flag(tile_x, tile_y, WALL, False)
+    nav_grid.refresh_tiles([(tile_x, tile_y)], terrain, collision_world)
+    sight_grid.refresh_rects(removed_rects)  # enemies can see through the open door
+    
+    # Store for respawning (the exact rects and wall flag, so respawning restores the same geometry)
+    removed_wall_tiles.append((tile_x, tile_y, removed_rects, was_wall))
     
     # Remove from tmx data if possible (for visual changes)
     try:
@@ -206,7 +247,7 @@ def remove_wall_tile(tile_pos):
 
 def respawn_items_on_death():
     """Respawn all removed items when player dies"""
-    global removed_items, removed_wall_tiles, collision_rects
+    global removed_items, removed_wall_tiles
     
     # Reset player flags
     game_player.reset_on_death()
@@ -227,21 +268,22 @@ def respawn_items_on_death():
     removed_items.clear()
     
     # Restore wall tiles
-    for tile_data in removed_wall_tiles:
-        if len(tile_data) == 4:  # New format: (tile_x, tile_y, world_x, world_y)
-            tile_x, tile_y, world_x, world_y = tile_data
-        else:  # Old format: (tile_x, tile_y)
-            tile_x, tile_y = tile_data
-            world_x, world_y = tile_x * 16, tile_y * 16
-        
-        # Add back to collision_rects
-        tile_rect = pygame.Rect(world_x, world_y, 16, 16)
-        collision_rects.append(tile_rect)
+    restored_tiles = []
+    for tile_x, tile_y, removed_rects, was_wall in removed_wall_tiles:
+        # Add the tile's original rects back to the collision world
+        collision_world.add_tile((tile_x, tile_y), removed_rects)
+        if was_wall:
+            terrain.set_flag(tile_x, tile_y, WALL)
+        restored_tiles.append((tile_x, tile_y))
         print(f"Restored collision rect for tile at ({tile_x}, {tile_y})")
         
         # Restore in tmx data (this would require more complex logic to restore the original gid)
         # For now, we'll just restore collision
     
+    # Close the restored tiles in the nav grid (and for line of sight) again
+    nav_grid.refresh_tiles(restored_tiles, terrain, collision_world)
+    sight_grid.refresh_rects([rect for _, _, removed_rects, _ in removed_wall_tiles for rect in removed_rects])
+    
     # Clear removed wall tiles list
     removed_wall_tiles.clear()
     
@@ -265,8 +307,8 @@ while running:
     # check what tile the player is standing on and adjust speed
     player_center_x, player_center_y = game_player.rect.center
     
-    # adjust player speed based on tile properties
-    if tiles.is_tile_slow(tmx_data, player_center_x, player_center_y, 16):
+    # adjust player speed based on tile properties (terrain flags, not a walk over the map layers)
+    if terrain.is_slow_at(player_center_x, player_center_y):
         if(game_player.box):
             game_player.set_speed_modifier(0.25) #quarter speed
         else: 
@@ -285,26 +327,31 @@ while running:
     overlapping_locker = False
     current_locker_item = None
     
-    for item in items_group:
-        if item.item_name == 'trees' and player_rect.colliderect(item.rect):
+    for item in items_group.query(player_rect, ('trees', 'locker')):
+        if item.item_name == 'trees':
             overlapping_trees = True
-        elif item.item_name == 'locker' and player_rect.colliderect(item.rect):
+        elif item.item_name == 'locker':
             overlapping_locker = True
             current_locker_item = item
     
     # update player (handles movement, collisions, and animation)
     # pass the overlapping_trees and overlapping_locker state to the player
-    dx, dy, thrown_bottle, dropped_book_pos, dropped_box_pos = game_player.update(dt, collision_rects, enemies_group, overlapping_trees, overlapping_locker)
+    dx, dy, thrown_bottle, dropped_book_pos, dropped_box_pos = game_player.update(dt, collision_world, enemies_group, overlapping_trees, overlapping_locker)
     
     # update enemies
+    enemy_vision.new_frame()
     for enemy in enemies_group:
         enemy.update(dt)
         
         # collect bullets fired by enemies
         for bullet in enemy.fired_bullets:
-            bullet_projectiles_group.add(bullet)
-            camera_group.add(bullet, layer=1)  # add on layer 1 (above ground, below player)
-        enemy.fired_bullets.clear()  # clear the list after adding to groups
+            projectiles.spawn_bullet(*bullet)
+        enemy.fired_bullets.clear()  # clear the list after spawning them
+    
+    # run queued path searches within this frame's budget
+    path_scheduler.run()
+    if path_workers is not None:
+        path_workers.run()  # sync map changes, pick up finished worker searches
     
     # set the animating locker item when animation starts
     if game_player.locker_animation_active and current_locker_item and not animating_locker_item:
@@ -325,11 +372,6 @@ while running:
             game_player.locker_animation_active = False
             animating_locker_item = None
     
-    # handle thrown bottle
-    if thrown_bottle:
-        bottle_projectiles_group.add(thrown_bottle)
-        camera_group.add(thrown_bottle, layer=1)  # add on layer 1 (above ground, below player)
-    
     # handle dropped book
     if dropped_book_pos:
         # create a new book item at the drop position
@@ -368,110 +410,78 @@ while running:
     
     # handle thrown bottle
     if thrown_bottle:
-        bottle_projectiles_group.add(thrown_bottle)
-        camera_group.add(thrown_bottle, layer=1)  # add on layer 1 (above ground, below player)
-    
-    # update bottle projectiles
-    bottles_to_remove = []
-    for bottle in bottle_projectiles_group:
-        # check if bottle hit something
-        if bottle.update(dt, collision_rects):
-            bottles_to_remove.append(bottle)
-    
-    # remove bottles that hit walls
-    for bottle in bottles_to_remove:
-        bottle_projectiles_group.remove(bottle)
-        camera_group.remove(bottle)
-    
-    # update bullet projectiles
-    bullets_to_remove = []
-    for bullet in bullet_projectiles_group:
-        # check if bullet hit something
-        collision_result = bullet.update(dt, collision_rects, game_player)
-        if collision_result == "player_hit":
-            # Player was hit by bullet - reset the game
-            print("Player hit by bullet! Resetting game...")
-            # Reset player position
-            game_player.position = pygame.Vector2(player_start_pos)
-            game_player.rect.center = player_start_pos
-            game_player.moveable = True
-            game_player.speed_modifier = 1.0
-            game_player.box_animation_active = False
-            game_player.locker_animation_active = False
+        projectiles.spawn_bottle(*thrown_bottle)
+    
+    # move every bottle and bullet, dropping the ones that hit walls
+    if projectiles.update(dt, collision_world, game_player.position):
+        # Player was hit by bullet - reset the game
+        print("Player hit by bullet! Resetting game...")
+        # Reset player position
+        game_player.position = pygame.Vector2(player_start_pos)
+        game_player.rect.center = player_start_pos
+        game_player.moveable = True
+        game_player.speed_modifier = 1.0
+        game_player.box_animation_active = False
+        game_player.locker_animation_active = False
+        
+        # Respawn all items and walls
+        respawn_items_on_death()
+        
+        # Remove all bullets and bottle projectiles
+        projectiles.clear()
+        # Reset all enemies to their starting positions and states
+        for i, enemy in enumerate(enemies_group):
+            # Reset position
+            enemy.position = pygame.Vector2(enemy_spawn_positions[i])
+            enemy.rect.center = enemy_spawn_positions[i]
+            
+            # Reset state machine
+            enemy.state = "patrol"
+            enemy.path = []
+            
+            # Reset patrol path - restore original patrol path for this enemy
+            patrol_path = enemy_patrol_paths[i] if i < len(enemy_patrol_paths) else enemy_patrol_paths[0]
+            enemy.patrol_path_tiles = patrol_path
+            enemy.patrol_index = 0
+            enemy._convert_patrol_path_to_pixels()
+            
+            # Reset detection flags
+            enemy.player_seen_clearly = False
+            enemy.player_glimpsed = False
+            enemy.sound_heard = False
+            enemy.book_spotted = False
+            enemy.last_known_player_position = None
+            enemy.distraction_position = None
+            
+            # Reset combat
+            enemy.fired_bullets.clear()
+            enemy.last_shot_time = 0
+            
+            # Reset AI timing
+            enemy.last_AI_check = 0
+            
+            # Reset icons
+            enemy.show_icon = False
+            enemy.icon_timer = 0.0
+            enemy.current_icon = None
             
-            # Respawn all items and walls
-            respawn_items_on_death()
+            # Reset all behavior timers
+            if hasattr(enemy, 'inspect_timer'):
+                enemy.inspect_timer = 0.0
+            if hasattr(enemy, 'distracted_timer'):
+                enemy.distracted_timer = 0.0
             
-            # Remove all bullets
-            for b in bullet_projectiles_group:
-                camera_group.remove(b)
-            bullet_projectiles_group.empty()
-            # Remove all bottle projectiles
-            for bottle in bottle_projectiles_group:
-                camera_group.remove(bottle)
-            bottle_projectiles_group.empty()
-            # Reset all enemies to their starting positions and states
-            for i, enemy in enumerate(enemies_group):
-                # Reset position
-                enemy.position = pygame.Vector2(enemy_spawn_positions[i])
-                enemy.rect.center = enemy_spawn_positions[i]
-                
-                # Reset state machine
-                enemy.state = "patrol"
-                enemy.path = []
-                
-                # Reset patrol path - restore original patrol path for this enemy
-                patrol_path = enemy_patrol_paths[i] if i < len(enemy_patrol_paths) else enemy_patrol_paths[0]
-                enemy.patrol_path_tiles = patrol_path
-                enemy.patrol_index = 0
-                enemy._convert_patrol_path_to_pixels()
-                
-                # Reset detection flags
-                enemy.player_seen_clearly = False
-                enemy.player_glimpsed = False
-                enemy.sound_heard = False
-                enemy.book_spotted = False
-                enemy.last_known_player_position = None
-                enemy.distraction_position = None
-                
-                # Reset combat
-                enemy.fired_bullets.clear()
-                enemy.last_shot_time = 0
-                
-                # Reset AI timing
-                enemy.last_AI_check = 0
-                
-                # Reset icons
-                enemy.show_icon = False
-                enemy.icon_timer = 0.0
-                enemy.current_icon = None
-                
-                # Reset all behavior timers
-                if hasattr(enemy, 'inspect_timer'):
-                    enemy.inspect_timer = 0.0
-                if hasattr(enemy, 'distracted_timer'):
-                    enemy.distracted_timer = 0.0
-                
-                # Reset animator to default state
-                enemy.animator.current_direction = "down"
-                enemy.animator.current_frame_index = 0
-                enemy.animator.animation_timer = 0.0
-                enemy.image = enemy.sprites["down"][0]
-            bullets_to_remove.clear()
-            break
-        elif collision_result == "wall_hit":
-            bullets_to_remove.append(bullet)
-    
-    # remove bullets that hit walls
-    for bullet in bullets_to_remove:
-        bullet_projectiles_group.remove(bullet)
-        camera_group.remove(bullet)
+            # Reset animator to default state
+            enemy.animator.current_direction = "down"
+            enemy.animator.current_frame_index = 0
+            enemy.animator.animation_timer = 0.0
+            enemy.image = enemy.sprites["down"][0]
     
     # check for item collisions (open_box, bottle, book, keys, locks - trees and locker handled above)
     player_rect = game_player.rect
     items_to_remove = []
     
-    for item in items_group:
+    for item in items_group.query(player_rect, ('open_box', 'bottle', 'book', 'key1', 'key2', 'lock1', 'lock2', 'win')):
         if item.item_name == 'open_box':  # check for open_box specifically
             if player_rect.colliderect(item.rect):
                 print(f"Player is touching the open_box at position ({item.rect.x}, {item.rect.y})")
@@ -540,6 +550,7 @@ while running:
     
     # center camera on player
     camera_group.center(game_player.rect.center)
+    projectiles.sync_sprites(camera_group, dt)  # sprites for the projectiles in view
     
     # draw everything (map and sprites)
     # note: no need to fill screen, pyscroll handles clearing
@@ -552,7 +563,7 @@ while running:
 
     # draw FPS counter
     fps = clock.get_fps()
-    fps_text = font.render(f"FPS: {fps:.1f}", True, fps_counter_color)
+    fps_text = font.render(f"FPS: {fps:.1f}  paths: {path_scheduler.queue_depth} queued {path_scheduler.last_wait_ms:.0f}ms  cache: {path_cache.hit_rate:.0%}  sight: {sight_cache.hit_rate:.0%}", True, fps_counter_color)
     screen.blit(fps_text, (10, 10))
     screen.blit(z_button_ui, (30, 30))  # draw Z button UI
     if overlapping_trees and not game_player.box:
@@ -607,4 +618,6 @@ if game_won:
         # Control frame rate
         clock.tick(60)
 
+if path_workers is not None:
+    path_workers.shutdown()
 pygame.quit()
\ No newline at end of file
@@ -0,0 +1,345 @@
+"""
+Hierarchical pathfinding (HPA*) over clusters of the shared NavGrid
+"""
+import heapq
+from nav_grid import BLOCKED
+from pathfinding import DIAGONAL_COST, DIRECTIONS, octile_distance
+
+
+class HierarchicalPathfinder:
+    """Two-level pathfinder for long-range queries
+
+    The grid is cut into square clusters. Open stretches along each cluster
+    border become entrances, and the cheapest path between every pair of
+    entrances inside a cluster is precomputed at load time. A long query then
+    only searches inside the start and goal clusters plus a small abstract
+    graph of entrances, and the tile path is stitched from the stored pieces.
+    When a lock door changes the nav grid, only the clusters holding the
+    changed tiles get their borders and intra-cluster edges redone (update).
+    """
+
+    def __init__(self, nav_grid, cluster_size=10, max_entrance_width=6):
+        self.nav_grid = nav_grid
+        self.cluster_size = cluster_size
+        self.max_entrance_width = max_entrance_width  # wider openings get an entrance at each end
+        self.clusters_x = (nav_grid.width + cluster_size - 1) // cluster_size
+        self.clusters_y = (nav_grid.height + cluster_size - 1) // cluster_size
+        self.build()
+
+    def build(self):
+        """(Re)build entrances and precomputed intra-cluster edges from the nav grid"""
+        self.built_version = self.nav_grid.version
+        # edges[node] -> list of (neighbor, cost, tiles) where tiles excludes node and includes neighbor
+        self.edges = {}
+        # cluster_entrances[(cluster_x, cluster_y)] -> set of entrance node indices
+        self.cluster_entrances = {
+            (cluster_x, cluster_y): set()
+            for cluster_x in range(self.clusters_x) for cluster_y in range(self.clusters_y)
+        }
+        # border_links[border] -> (node_a, node_b) transition pairs across that border (see _cluster_borders)
+        self.border_links = {}
+        for cluster in self.cluster_entrances:
+            for border in self._cluster_borders(cluster):
+                if border[1:] == cluster:  # each border once, from the cluster right of / below it
+                    self._find_entrances(border)
+        for cluster, entrances in self.cluster_entrances.items():
+            self._connect_cluster(cluster, entrances)
+
+    def update(self):
+        """Catch up with nav grid changes, redoing only the clusters that hold a changed tile
+
+        Their four borders are rescanned for entrances, and they (plus any
+        cluster across those borders whose entrances moved) get their
+        intra-cluster edges recomputed. A grid without the change
+        history (a path worker's copy) is rebuilt in full.
+        """
+        grid = self.nav_grid
+        if self.built_version == grid.version:
+            return
+        if len(grid.changes) < grid.version:
+            self.build()
+            return
+        changed = grid.changed_tiles_since(self.built_version)
+        self.built_version = grid.version
+        width = grid.width
+
+        dirty = {self._cluster_of(tile_y * width + tile_x) for tile_x, tile_y in changed}
+        borders = {border for cluster in dirty for border in self._cluster_borders(cluster)}
+        neighbors = {cluster for border in borders for cluster in self._border_clusters(border)} - dirty
+        # _link adds to cluster_entrances as the borders are rescanned, so compare against copies
+        old_entrances = {cluster: set(self.cluster_entrances[cluster]) for cluster in dirty | neighbors}
+
+        # rescan the borders, replacing their transitions
+        for border in borders:
+            for node_a, node_b in self.border_links.pop(border, ()):
+                self.edges[node_a] = [edge for edge in self.edges.get(node_a, ()) if edge[0] != node_b]
+                self.edges[node_b] = [edge for edge in self.edges.get(node_b, ()) if edge[0] != node_a]
+            self._find_entrances(border)
+
+        # reconnect the changed clusters, and the ones across their borders whose entrances moved
+        # (an untouched cluster with the same entrances keeps the same edges)
+        for cluster in dirty | neighbors:
+            entrances = set()
+            for border in self._cluster_borders(cluster):
+                for link in self.border_links.get(border, ()):
+                    entrances.update(node for node in link if self._cluster_of(node) == cluster)
+            if cluster not in dirty and entrances == old_entrances[cluster]:
+                continue
+            for node in old_entrances[cluster] | entrances:
+                self.edges[node] = [edge for edge in self.edges.get(node, ()) if self._cluster_of(edge[0]) != cluster]
+            self.cluster_entrances[cluster] = entrances
+            self._connect_cluster(cluster, entrances)
+        for node in [node for node, edges in self.edges.items() if not edges]:
+            del self.edges[node]
+
+    def _cluster_of(self, index):
+        width = self.nav_grid.width
+        return (index % width) // self.cluster_size, (index // width) // self.cluster_size
+
+    def _cluster_bounds(self, cluster):
+        """Inclusive tile bounds (first_x, first_y, last_x, last_y) of a cluster"""
+        cluster_x, cluster_y = cluster
+        first_x = cluster_x * self.cluster_size
+        first_y = cluster_y * self.cluster_size
+        return (first_x, first_y,
+                min(first_x + self.cluster_size, self.nav_grid.width) - 1,
+                min(first_y + self.cluster_size, self.nav_grid.height) - 1)
+
+    def _cluster_borders(self, cluster):
+        """Borders of a cluster that have a cluster on the other side
+
+        A border is ("vertical", x, y) for the left edge or ("horizontal", x, y)
+        for the top edge of cluster (x, y).
+        """
+        cluster_x, cluster_y = cluster
+        borders = []
+        if cluster_x > 0:
+            borders.append(("vertical", cluster_x, cluster_y))
+        if cluster_y > 0:
+            borders.append(("horizontal", cluster_x, cluster_y))
+        if cluster_x + 1 < self.clusters_x:
+            borders.append(("vertical", cluster_x + 1, cluster_y))
+        if cluster_y + 1 < self.clusters_y:
+            borders.append(("horizontal", cluster_x, cluster_y + 1))
+        return borders
+
+    def _border_clusters(self, border):
+        """The two clusters a border separates"""
+        orientation, cluster_x, cluster_y = border
+        if orientation == "vertical":
+            return (cluster_x - 1, cluster_y), (cluster_x, cluster_y)
+        return (cluster_x, cluster_y - 1), (cluster_x, cluster_y)
+
+    def _find_entrances(self, border):
+        """Scan one cluster border for open runs and add a transition pair per run (or two for wide runs)"""
+        grid = self.nav_grid
+        size = self.cluster_size
+        orientation, cluster_x, cluster_y = border
+        if orientation == "vertical":
+            # between (x - 1, y) and (x, y)
+            border_x = cluster_x * size
+            first_y = cluster_y * size
+            last_y = min(first_y + size, grid.height) - 1
+            crossings = [((border_x - 1, y), (border_x, y)) for y in range(first_y, last_y + 1)]
+        else:
+            # between (x, y - 1) and (x, y)
+            border_y = cluster_y * size
+            first_x = cluster_x * size
+            last_x = min(first_x + size, grid.width) - 1
+            crossings = [((x, border_y - 1), (x, border_y)) for x in range(first_x, last_x + 1)]
+        self.border_links[border] = self._add_transitions(crossings)
+
+    def _add_transitions(self, crossings):
+        """Split a border into maximal open runs and link the runs' transition tiles
+
+        Returns:
+            list: (node_a, node_b) for each transition added
+        """
+        grid = self.nav_grid
+        width = grid.width
+        links = []
+        run = []
+        for crossing in crossings + [None]:
+            if crossing is not None and grid.is_walkable(*crossing[0]) and grid.is_walkable(*crossing[1]):
+                run.append(crossing)
+                continue
+            if run:
+                if len(run) >= self.max_entrance_width:
+                    picked = [run[0], run[-1]]
+                else:
+                    picked = [run[len(run) // 2]]
+                for side_a, side_b in picked:
+                    self._link(side_a, side_b)
+                    links.append((side_a[1] * width + side_a[0], side_b[1] * width + side_b[0]))
+                run = []
+        return links
+
+    def _link(self, tile_a, tile_b):
+        """Add a two-way inter-cluster edge between neighboring border tiles"""
+        width = self.nav_grid.width
+        costs = self.nav_grid.costs
+        node_a = tile_a[1] * width + tile_a[0]
+        node_b = tile_b[1] * width + tile_b[0]
+        self.edges.setdefault(node_a, []).append((node_b, costs[node_b], [tile_b]))
+        self.edges.setdefault(node_b, []).append((node_a, costs[node_a], [tile_a]))
+        self.cluster_entrances[self._cluster_of(node_a)].add(node_a)
+        self.cluster_entrances[self._cluster_of(node_b)].add(node_b)
+
+    def _connect_cluster(self, cluster, entrances):
+        """Precompute cheapest paths between all entrances of one cluster"""
+        bounds = self._cluster_bounds(cluster)
+        for entrance in entrances:
+            dist, parents = self._cluster_dijkstra(entrance, bounds)
+            for other in entrances:
+                if other != entrance and other in dist:
+                    self.edges.setdefault(entrance, []).append(
+                        (other, dist[other], self._trace(parents, other)))
+
+    def _cluster_dijkstra(self, source, bounds, reverse=False):
+        """Dijkstra from source that never leaves bounds
+
+        With reverse=True distances are *to* source (the cost of a step is the
+        cost of the tile being entered, so the direction matters) and parents
+        point one step closer to source.
+        """
+        grid = self.nav_grid
+        width = grid.width
+        costs = grid.costs
+        first_x, first_y, last_x, last_y = bounds
+
+        dist = {source: 0}
+        parents = {}
+        heap = [(0, source)]
+        while heap:
+            current_dist, current = heapq.heappop(heap)
+            if current_dist > dist[current]:
+                continue
+            current_x = current % width
+            current_y = current // width
+            for step_x, step_y in DIRECTIONS:
+                neighbor_x = current_x + step_x
+                neighbor_y = current_y + step_y
+                if not (first_x <= neighbor_x <= last_x and first_y <= neighbor_y <= last_y):
+                    continue
+                neighbor = neighbor_y * width + neighbor_x
+                if costs[neighbor] == BLOCKED:
+                    continue
+
+                # reversed searches pay for entering current (the step is neighbor -> current)
+                move_cost = costs[current] if reverse else costs[neighbor]
+                if step_x != 0 and step_y != 0:
+                    # no corner cutting (corner tiles may sit just outside the cluster)
+                    if (costs[current_y * width + neighbor_x] == BLOCKED or
+                            costs[neighbor_y * width + current_x] == BLOCKED):
+                        continue
+                    move_cost *= DIAGONAL_COST
+
+                new_dist = current_dist + move_cost
+                if new_dist < dist.get(neighbor, float('inf')):
+                    dist[neighbor] = new_dist
+                    parents[neighbor] = current
+                    heapq.heappush(heap, (new_dist, neighbor))
+        return dist, parents
+
+    def _trace(self, parents, node):
+        """Tiles from just after the search source up to node, using forward parents"""
+        width = self.nav_grid.width
+        tiles = []
+        while node in parents:
+            tiles.append((node % width, node // width))
+            node = parents[node]
+        tiles.reverse()
+        return tiles
+
+    def _trace_reverse(self, parents, node):
+        """Tiles from just after node up to the reverse search source"""
+        width = self.nav_grid.width
+        tiles = []
+        while node in parents:
+            node = parents[node]
+            tiles.append((node % width, node // width))
+        return tiles
+
+    def find_path(self, start_tile, goal_tile, max_nodes=2000):
+        """Find a tile path between any two tiles on the map
+
+        Returns:
+            list: Tiles from the one after start up to and including goal (same format as
+            pathfinding.a_star), or [] if the goal can't be reached
+        """
+        grid = self.nav_grid
+        width = grid.width
+        self.update()  # a lock door opened or closed, entrances near it may have changed
+        if not (grid.in_bounds(*start_tile) and grid.is_walkable(*goal_tile)):
+            return []
+        start = start_tile[1] * width + start_tile[0]
+        goal = goal_tile[1] * width + goal_tile[0]
+        if start == goal:
+            return []
+
+        # connect start and goal to the entrances of their own clusters
+        start_cluster = self._cluster_of(start)
+        goal_cluster = self._cluster_of(goal)
+        start_dist, start_parents = self._cluster_dijkstra(start, self._cluster_bounds(start_cluster))
+        goal_dist, goal_parents = self._cluster_dijkstra(goal, self._cluster_bounds(goal_cluster), reverse=True)
+        goal_entrances = self.cluster_entrances[goal_cluster]
+
+        # abstract A* over entrances; "start"/"goal" are virtual nodes so the
+        # original edge lists never have to be touched
+        goal_x, goal_y = goal_tile
+        g_score = {start: 0}
+        came_from = {}
+        closed = set()
+        heap = [(octile_distance(start_tile[0], start_tile[1], goal_x, goal_y), start)]
+        nodes_expanded = 0
+        while heap and nodes_expanded < max_nodes:
+            _, current = heapq.heappop(heap)
+            if current in closed:
+                continue
+            closed.add(current)
+            nodes_expanded += 1
+            if current == goal:
+                break
+
+            if current == start:
+                # start may reach the goal directly when both share a cluster
+                # (and start may itself be an entrance with links into the next cluster)
+                successors = [(node, dist, None) for node, dist in start_dist.items()
+                              if node == goal or node in self.cluster_entrances[start_cluster]]
+                successors += self.edges.get(start, [])
+            else:
+                successors = self.edges.get(current, [])
+                if current in goal_entrances and current in goal_dist:
+                    successors = successors + [(goal, goal_dist[current], None)]
+
+            current_g = g_score[current]
+            for neighbor, edge_cost, tiles in successors:
+                if neighbor in closed:
+                    continue
+                new_g = current_g + edge_cost
+                if new_g >= g_score.get(neighbor, float('inf')):
+                    continue
+                g_score[neighbor] = new_g
+                came_from[neighbor] = (current, tiles)
+                heapq.heappush(heap, (new_g + octile_distance(neighbor % width, neighbor // width, goal_x, goal_y), neighbor))
+
+        if goal not in closed:
+            return []
+
+        # refine: stitch the stored tile pieces back together
+        pieces = []
+        node = goal
+        while node != start:
+            previous, tiles = came_from[node]
+            if tiles is not None:
+                pieces.append(tiles)
+            elif previous == start:
+                pieces.append(self._trace(start_parents, node))
+            else:
+                pieces.append(self._trace_reverse(goal_parents, previous))
+            node = previous
+
+        path = []
+        for tiles in reversed(pieces):
+            path.extend(tiles)
+        return path
@@ -0,0 +1,239 @@
+"""
+Incremental replanning (LPA* with D* Lite's key modifier) for enemies chasing a moving target
+"""
+import heapq
+from nav_grid import BLOCKED
+from pathfinding import DIAGONAL_COST, DIRECTIONS, SLICE_EXPANSIONS, octile_distance, run_search
+
+
+INFINITY = float('inf')
+
+
+class IncrementalPlanner:
+    """Forward LPA* planner that keeps its search tree between replans
+
+    The search is rooted at the enemy's tile from the last reset, so g(s) is the
+    cost from the root to s and the goal (the player) only shows up in the
+    heuristic. When the goal moves the D* Lite key modifier km keeps the queued
+    keys valid lower bounds, so the repair picks up where the old search
+    stopped. When the enemy walks along its path the new path is just the
+    suffix after the enemy's tile, and when a lock door opens only the tiles
+    around it are updated. A fresh search only happens when the enemy leaves
+    the planned route or the tree grows too large.
+    """
+
+    def __init__(self, nav_grid, max_expansions=600, max_tree_size=3000):
+        self.nav_grid = nav_grid
+        self.max_expansions = max_expansions  # per replan; an unfinished repair resumes next time
+        self.max_tree_size = max_tree_size  # reset once this many tiles have a g-value
+        self.root = None
+        self.goal = None
+        self.last_expansions = 0
+        self.reset_count = 0
+
+    def _reset(self, root, goal):
+        self.root = root
+        self.goal = goal
+        self.km = 0
+        self.g = {}
+        self.rhs = {root: 0}
+        self.open_keys = {}  # node -> current key (heap entries with other keys are stale)
+        self.open_heap = []
+        self.seen_version = self.nav_grid.version
+        self.reset_count += 1
+        self._push(root)
+
+    def _heuristic(self, node):
+        width = self.nav_grid.width
+        return octile_distance(node % width, node // width, self.goal % width, self.goal // width)
+
+    def _calculate_key(self, node):
+        best = min(self.g.get(node, INFINITY), self.rhs.get(node, INFINITY))
+        return (best + self._heuristic(node) + self.km, best)
+
+    def _push(self, node):
+        key = self._calculate_key(node)
+        self.open_keys[node] = key
+        heapq.heappush(self.open_heap, (key, node))
+
+    def _top(self):
+        """Smallest live (key, node) in the open list, dropping stale heap entries"""
+        heap = self.open_heap
+        while heap:
+            key, node = heap[0]
+            if self.open_keys.get(node) == key:
+                return key, node
+            heapq.heappop(heap)
+        return (INFINITY, INFINITY), None
+
+    def _neighbors(self, node):
+        """(neighbor, cost of the move between node and neighbor) for walkable neighbors
+
+        Moves are symmetric (8 directions, no corner cutting), so these are both
+        the successors and the predecessors of node. The cost returned is for
+        entering neighbor; entering node costs the same multiplier times node's cost.
+        """
+        grid = self.nav_grid
+        width = grid.width
+        height = grid.height
+        costs = grid.costs
+        node_x = node % width
+        node_y = node // width
+        for step_x, step_y in DIRECTIONS:
+            neighbor_x = node_x + step_x
+            neighbor_y = node_y + step_y
+            if neighbor_x < 0 or neighbor_x >= width or neighbor_y < 0 or neighbor_y >= height:
+                continue
+            neighbor = neighbor_y * width + neighbor_x
+            move_cost = costs[neighbor]
+            if move_cost == BLOCKED:
+                continue
+            if step_x != 0 and step_y != 0:
+                if (costs[node_y * width + neighbor_x] == BLOCKED or
+                        costs[neighbor_y * width + node_x] == BLOCKED):
+                    continue
+                yield neighbor, DIAGONAL_COST
+            else:
+                yield neighbor, 1
+
+    def _update_vertex(self, node):
+        if node != self.root:
+            best = INFINITY
+            costs = self.nav_grid.costs
+            if costs[node] != BLOCKED:
+                g = self.g
+                for neighbor, multiplier in self._neighbors(node):
+                    candidate = g.get(neighbor, INFINITY) + costs[node] * multiplier
+                    if candidate < best:
+                        best = candidate
+            self.rhs[node] = best
+        self.open_keys.pop(node, None)
+        if self.g.get(node, INFINITY) != self.rhs.get(node, INFINITY):
+            self._push(node)
+
+    def _compute_shortest_path(self):
+        """Process inconsistent nodes until the goal is consistent (or the budget runs out)
+
+        Generator: yields every SLICE_EXPANSIONS expansions, returns True when the goal is settled.
+        """
+        expansions = 0
+        g = self.g
+        rhs = self.rhs
+        goal = self.goal
+        while expansions < self.max_expansions:
+            top_key, node = self._top()
+            if node is None or (top_key >= self._calculate_key(goal) and
+                                rhs.get(goal, INFINITY) == g.get(goal, INFINITY)):
+                self.last_expansions = expansions
+                return True
+            expansions += 1
+            if expansions % SLICE_EXPANSIONS == 0:
+                yield
+
+            new_key = self._calculate_key(node)
+            if top_key < new_key:
+                # key was computed before the goal moved, requeue with the real key
+                self._push(node)
+                continue
+
+            del self.open_keys[node]
+            if g.get(node, INFINITY) > rhs.get(node, INFINITY):
+                # lowered: a neighbor's rhs can only drop to the route through node, no full rescan needed
+                node_g = g[node] = rhs[node]
+                costs = self.nav_grid.costs
+                for neighbor, multiplier in self._neighbors(node):
+                    candidate = node_g + costs[neighbor] * multiplier
+                    if candidate < rhs.get(neighbor, INFINITY):
+                        rhs[neighbor] = candidate
+                        if g.get(neighbor, INFINITY) != candidate:
+                            self._push(neighbor)
+                        else:
+                            self.open_keys.pop(neighbor, None)
+            else:
+                g[node] = INFINITY
+                self._update_vertex(node)
+                for neighbor, _ in self._neighbors(node):
+                    self._update_vertex(neighbor)
+
+        self.last_expansions = expansions
+        return False
+
+    def _apply_map_changes(self):
+        """Update the tiles around every tile whose cost changed since the last replan"""
+        grid = self.nav_grid
+        width = grid.width
+        touched = set()
+        for tile_x, tile_y in grid.changed_tiles_since(self.seen_version):
+            for offset_y in (-1, 0, 1):
+                for offset_x in (-1, 0, 1):
+                    if grid.in_bounds(tile_x + offset_x, tile_y + offset_y):
+                        touched.add((tile_y + offset_y) * width + tile_x + offset_x)
+        for node in touched:
+            self._update_vertex(node)
+        self.seen_version = grid.version
+
+    def plan(self, start_tile, goal_tile):
+        """Repair the search for the current enemy/player tiles and return a tile path (see plan_steps)"""
+        return run_search(self.plan_steps(start_tile, goal_tile))
+
+    def plan_steps(self, start_tile, goal_tile):
+        """Repair the search for the current enemy/player tiles, as a resumable generator
+
+        Returns:
+            list: Tiles from the one after start up to and including goal (same format as
+            pathfinding.a_star), or [] if no path is known yet
+        """
+        grid = self.nav_grid
+        width = grid.width
+        if not (grid.is_walkable(*start_tile) and grid.is_walkable(*goal_tile)):
+            return []
+        start = start_tile[1] * width + start_tile[0]
+        goal = goal_tile[1] * width + goal_tile[0]
+
+        if self.root is None or len(self.g) > self.max_tree_size:
+            self._reset(start, goal)
+        else:
+            if goal != self.goal:
+                # goal moved: shift km so the keys already queued stay lower bounds
+                self.km += octile_distance(goal_tile[0], goal_tile[1], self.goal % width, self.goal // width)
+                self.goal = goal
+            if self.seen_version != grid.version:
+                self._apply_map_changes()
+
+        if not (yield from self._compute_shortest_path()):
+            return []
+        path = self._extract_path()
+
+        if start != self.root:
+            # reuse the suffix after the enemy's tile; if the enemy left the route, start over
+            if start_tile in path:
+                return path[path.index(start_tile) + 1:]
+            self._reset(start, goal)
+            if not (yield from self._compute_shortest_path()):
+                return []
+            path = self._extract_path()
+        return path
+
+    def _extract_path(self):
+        """Walk back from the goal along the cheapest predecessors to the root"""
+        width = self.nav_grid.width
+        costs = self.nav_grid.costs
+        g = self.g
+        node = self.goal
+        if g.get(node, INFINITY) == INFINITY:
+            return []
+        path = []
+        while node != self.root:
+            path.append((node % width, node // width))
+            best_node = None
+            best = INFINITY
+            for neighbor, multiplier in self._neighbors(node):
+                candidate = g.get(neighbor, INFINITY) + costs[node] * multiplier
+                if candidate < best:
+                    best = candidate
+                    best_node = neighbor
+            if best_node is None or best == INFINITY or len(path) > len(g):
+                return []
+            node = best_node
+        path.reverse()
+        return path
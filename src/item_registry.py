@@ -0,0 +1,79 @@
+"""
+Item sprite group indexed by kind and tile
+"""
+import pygame
+
+
+class ItemRegistry(pygame.sprite.Group):
+    """Sprite group that also buckets its items by item_name and by the tiles they cover
+
+    Items join and leave it like any group (tiles.Item(groups=[...]), remove()),
+    and every add or remove updates the buckets, so the game loop and the
+    enemy sensors can ask for the items of some kinds under a rect instead of
+    walking the whole group and comparing names. Items don't move once placed;
+    an item's cells are the ones its rect covered when it was added.
+    """
+
+    def __init__(self, *sprites, cell_size=16):
+        self.cell_size = cell_size
+        self.kinds = {}  # item_name -> {(cell_x, cell_y): {item: None}} (dicts as ordered sets)
+        self.item_cells = {}  # item -> (first_x, first_y, last_x, last_y) it was bucketed under
+        self.order = {}  # item -> when it was added, so queries keep the group's order
+        self.added_count = 0
+        super().__init__(*sprites)
+
+    def _cell_range(self, rect):
+        """Inclusive cell bounds (first_x, first_y, last_x, last_y) a rect overlaps"""
+        size = self.cell_size
+        # right/bottom are exclusive, and touching rects don't collide
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def add_internal(self, sprite, layer=None):
+        super().add_internal(sprite, layer)
+        cells = self.kinds.setdefault(sprite.item_name, {})
+        cell_range = self._cell_range(sprite.rect)
+        first_x, first_y, last_x, last_y = cell_range
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                cells.setdefault((cell_x, cell_y), {})[sprite] = None
+        self.item_cells[sprite] = cell_range
+        self.order[sprite] = self.added_count
+        self.added_count += 1
+
+    def remove_internal(self, sprite):
+        super().remove_internal(sprite)
+        cells = self.kinds[sprite.item_name]
+        first_x, first_y, last_x, last_y = self.item_cells.pop(sprite)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = cells[(cell_x, cell_y)]
+                del bucket[sprite]
+                if not bucket:
+                    del cells[(cell_x, cell_y)]
+        del self.order[sprite]
+
+    def query(self, rect, kinds=None):
+        """Items (of the given item_names, default all) whose rect collides with rect, in group order"""
+        first_x, first_y, last_x, last_y = self._cell_range(rect)
+        area_cells = (last_x - first_x + 1) * (last_y - first_y + 1)
+        found = {}
+        for kind in (self.kinds if kinds is None else kinds):
+            cells = self.kinds.get(kind)
+            if not cells:
+                continue
+            if len(cells) < area_cells:
+                # fewer occupied cells than the area covers: check those instead
+                for (cell_x, cell_y), bucket in cells.items():
+                    if first_x <= cell_x <= last_x and first_y <= cell_y <= last_y:
+                        found.update(bucket)
+            else:
+                for cell_y in range(first_y, last_y + 1):
+                    for cell_x in range(first_x, last_x + 1):
+                        bucket = cells.get((cell_x, cell_y))
+                        if bucket:
+                            found.update(bucket)
+        hits = [item for item in found if rect.colliderect(item.rect)]
+        if len(hits) > 1:
+            hits.sort(key=self.order.__getitem__)
+        return hits
@@ -0,0 +1,147 @@
+"""
+Shared navigation grid used by enemy pathfinding
+"""
+import pygame
+from spatial_hash import nearby_rects
+from terrain import WALL, SLOW
+
+
+BLOCKED = 0  # cost byte for impassable tiles
+NORMAL_COST = 1
+SLOW_COST = 3
+
+
+class NavGrid:
+    """Flat, array-backed movement cost grid (one byte per tile)
+
+    Built once at load time from the terrain flags and the collision
+    rectangles, then shared by every enemy so that a cost lookup is
+    a single index instead of a dict lookup plus a scan over every rect.
+    """
+
+    def __init__(self, width, height, tile_size=16, terrain=None, collision_rects=None):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        # costs[y * width + x] -> BLOCKED, NORMAL_COST or SLOW_COST
+        self.costs = bytearray([NORMAL_COST]) * (width * height)
+
+        if terrain is not None:
+            for index, flags in enumerate(terrain.flags):
+                if flags & WALL:
+                    self.costs[index] = BLOCKED
+                elif flags & SLOW:
+                    self.costs[index] = SLOW_COST
+
+        for rect in (collision_rects or []):
+            self._block_tiles_under_rect(rect)
+
+        # bumped whenever tile costs change at runtime (lock doors); changes[i] lists
+        # the tiles changed by the edit that produced version i + 1
+        self.version = 0
+        self.changes = []
+
+        # uniform[i] = 1 for normal-cost tiles with no slow neighbor; Jump Point Search
+        # may skip straight over these, everywhere else it falls back to plain A* steps
+        self.uniform = bytearray(width * height)
+        self._compute_uniform(0, 0, width - 1, height - 1)
+
+    @classmethod
+    def from_buffers(cls, width, height, costs, uniform, tile_size=16, version=0):
+        """Wrap existing cost/uniform buffers (e.g. shared memory in a path worker) without copying"""
+        grid = cls.__new__(cls)
+        grid.width = width
+        grid.height = height
+        grid.tile_size = tile_size
+        grid.costs = costs
+        grid.uniform = uniform
+        grid.version = version
+        grid.changes = []
+        return grid
+
+    def refresh_tiles(self, tile_positions, terrain, collision_rects):
+        """Recompute the cost of specific tiles after the map changed (lock doors opening or respawning)
+
+        Returns:
+            list: The tiles whose cost actually changed
+        """
+        tile_size = self.tile_size
+        quarter = tile_size // 4
+        half = tile_size // 2
+        changed = []
+        for tile_x, tile_y in tile_positions:
+            if not self.in_bounds(tile_x, tile_y):
+                continue
+            if terrain.is_wall(tile_x, tile_y):
+                cost = BLOCKED
+            else:
+                test_rect = pygame.Rect(tile_x * tile_size + half - quarter, tile_y * tile_size + half - quarter, half, half)
+                if any(test_rect.colliderect(rect) for rect in nearby_rects(collision_rects, test_rect)):
+                    cost = BLOCKED
+                elif terrain.is_slow(tile_x, tile_y):
+                    cost = SLOW_COST
+                else:
+                    cost = NORMAL_COST
+            index = tile_y * self.width + tile_x
+            if self.costs[index] != cost:
+                self.costs[index] = cost
+                self._compute_uniform(tile_x - 1, tile_y - 1, tile_x + 1, tile_y + 1)
+                changed.append((tile_x, tile_y))
+
+        if changed:
+            self.changes.append(changed)
+            self.version += 1
+        return changed
+
+    def changed_tiles_since(self, version):
+        """All tiles changed after the given version (for planners catching up incrementally)"""
+        return [tile for change in self.changes[version:] for tile in change]
+
+    def _block_tiles_under_rect(self, rect):
+        """Mark every tile whose center area overlaps the rect as blocked"""
+        tile_size = self.tile_size
+        quarter = tile_size // 4
+        half = tile_size // 2
+
+        # only the tiles the rect can touch need testing
+        first_x = max(0, rect.left // tile_size - 1)
+        last_x = min(self.width - 1, rect.right // tile_size + 1)
+        first_y = max(0, rect.top // tile_size - 1)
+        last_y = min(self.height - 1, rect.bottom // tile_size + 1)
+
+        test_rect = pygame.Rect(0, 0, half, half)
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                # same small center rect the old per-query check used, so tile edges don't count
+                test_rect.topleft = (tile_x * tile_size + half - quarter, tile_y * tile_size + half - quarter)
+                if test_rect.colliderect(rect):
+                    self.costs[tile_y * self.width + tile_x] = BLOCKED
+
+    def _compute_uniform(self, first_x, first_y, last_x, last_y):
+        """Recompute the uniform-cost flags for an inclusive tile range"""
+        width = self.width
+        costs = self.costs
+        for tile_y in range(max(0, first_y), min(self.height - 1, last_y) + 1):
+            for tile_x in range(max(0, first_x), min(width - 1, last_x) + 1):
+                index = tile_y * width + tile_x
+                is_uniform = costs[index] == NORMAL_COST
+                if is_uniform:
+                    for neighbor_y in range(max(0, tile_y - 1), min(self.height, tile_y + 2)):
+                        for neighbor_x in range(max(0, tile_x - 1), min(width, tile_x + 2)):
+                            if costs[neighbor_y * width + neighbor_x] == SLOW_COST:
+                                is_uniform = False
+                self.uniform[index] = 1 if is_uniform else 0
+
+    def in_bounds(self, tile_x, tile_y):
+        return 0 <= tile_x < self.width and 0 <= tile_y < self.height
+
+    def cost(self, tile_x, tile_y):
+        """Movement cost for a tile, float('inf') for walls and out-of-bounds tiles"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return float('inf')
+        cost = self.costs[tile_y * self.width + tile_x]
+        return cost if cost != BLOCKED else float('inf')
+
+    def is_walkable(self, tile_x, tile_y):
+        return (0 <= tile_x < self.width and 0 <= tile_y < self.height and
+                self.costs[tile_y * self.width + tile_x] != BLOCKED)
@@ -0,0 +1,54 @@
+"""
+LRU cache of solved tile paths, shared by all enemies
+"""
+from collections import OrderedDict
+
+
+class PathCache:
+    """Remembers recent tile paths keyed by (start tile, goal tile, cost profile)
+
+    The cost profile is whatever else decides the result (search method and
+    distance cap), so two queries with the same key always get the same path.
+    Every entry is dropped when the nav grid's version moves, i.e. when
+    remove_wall_tile or respawn_items_on_death changes a tile's cost.
+    """
+
+    def __init__(self, nav_grid, max_entries=256):
+        self.nav_grid = nav_grid
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # key -> tuple of tiles, least recently used first
+        self.version = nav_grid.version
+
+        self.hits = 0
+        self.misses = 0  # lookups that had to run a search (counted when the result is stored)
+        self.invalidations = 0
+
+    def _check_version(self):
+        if self.version != self.nav_grid.version:
+            self.entries.clear()
+            self.version = self.nav_grid.version
+            self.invalidations += 1
+
+    def get(self, key):
+        """Cached tile path for key (as a new list), or None if it isn't cached"""
+        self._check_version()
+        tiles = self.entries.get(key)
+        if tiles is None:
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return list(tiles)
+
+    def put(self, key, tile_path):
+        """Store a freshly searched tile path, evicting the least recently used one if full"""
+        self._check_version()
+        self.misses += 1
+        self.entries[key] = tuple(tile_path)
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,119 @@
+"""
+Frame-budgeted scheduler for enemy path requests
+"""
+import time
+
+
+class PathRequest:
+    """One queued search: a generator from pathfinding.py (or compatible) plus bookkeeping"""
+
+    def __init__(self, key, steps, priority):
+        self.key = key
+        self.steps = steps
+        self.priority = priority
+        self.submitted_at = time.perf_counter()
+        self.result = None
+        self.requested_frame = None  # last frame the owner still asked for it
+        self.finished_frame = None
+
+
+class PathScheduler:
+    """Central queue that runs path searches within a per-frame time budget
+
+    Enemies submit searches as generators (see pathfinding.SLICE_EXPANSIONS)
+    instead of running them inline, and run() advances the queued searches in
+    priority order until the frame's budget is spent. A search that doesn't
+    finish is resumed on the next frame, so frame time stays flat no matter how
+    many enemies replan at once. Each owner (an EnemyBehaviors) has at most one
+    outstanding request.
+    """
+
+    def __init__(self, budget_ms=2.0):
+        self.budget_ms = budget_ms
+        self.pending = {}  # owner -> PathRequest still being searched
+        self.finished = {}  # owner -> PathRequest waiting to be collected
+        self.frame = 0
+
+        # stats for the debug overlay
+        self.completed_count = 0
+        self.last_wait_ms = 0.0
+        self.max_wait_ms = 0.0
+        self.total_wait_ms = 0.0
+
+    def request(self, owner, key, make_steps, priority):
+        """Ask for a path, returning the result once it's ready and None while it's queued
+
+        Args:
+            owner: Object making the request (one outstanding request per owner)
+            key: Hashable description of the query; a different key replaces the old request
+            make_steps: Function returning the search generator (only called when submitting)
+            priority: Lower runs first
+        """
+        finished = self.finished.get(owner)
+        if finished is not None and finished.key == key:
+            del self.finished[owner]
+            return finished.result
+
+        pending = self.pending.get(owner)
+        if pending is not None and pending.key == key:
+            pending.priority = priority
+            pending.requested_frame = self.frame
+            return None
+
+        # new query: drop whatever this owner asked for before
+        self.finished.pop(owner, None)
+        request = PathRequest(key, make_steps(), priority)
+        request.requested_frame = self.frame
+        self.pending[owner] = request
+        return None
+
+    def has_request(self, owner, key):
+        """True if owner's queued or uncollected request is for key (asking again won't resubmit it)"""
+        for request in (self.finished.get(owner), self.pending.get(owner)):
+            if request is not None and request.key == key:
+                return True
+        return False
+
+    def cancel(self, owner):
+        """Forget any pending or uncollected request from owner"""
+        self.pending.pop(owner, None)
+        self.finished.pop(owner, None)
+
+    def run(self):
+        """Advance queued searches, highest priority first, until the frame budget is spent"""
+        deadline = time.perf_counter() + self.budget_ms / 1000
+        self.frame += 1
+        # enemies ask again every frame until they get their path, so anything nobody asked
+        # for during the last frame belongs to an enemy that changed its mind (or state)
+        for owner in [owner for owner, request in self.pending.items() if request.requested_frame < self.frame - 1]:
+            del self.pending[owner]
+        for owner in [owner for owner, request in self.finished.items() if request.finished_frame < self.frame - 1]:
+            del self.finished[owner]
+
+        while self.pending and time.perf_counter() < deadline:
+            owner, request = min(self.pending.items(), key=lambda item: (item[1].priority, item[1].submitted_at))
+            while time.perf_counter() < deadline:
+                try:
+                    next(request.steps)
+                except StopIteration as finished:
+                    request.result = finished.value
+                    request.finished_frame = self.frame
+                    del self.pending[owner]
+                    self.finished[owner] = request
+                    self._record_wait(request)
+                    break
+
+    def _record_wait(self, request):
+        wait_ms = (time.perf_counter() - request.submitted_at) * 1000
+        self.completed_count += 1
+        self.last_wait_ms = wait_ms
+        self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+        self.total_wait_ms += wait_ms
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    @property
+    def average_wait_ms(self):
+        return self.total_wait_ms / self.completed_count if self.completed_count else 0.0
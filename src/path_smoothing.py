@@ -0,0 +1,109 @@
+"""
+Path smoothing (string pulling) for tile paths returned by the pathfinders
+"""
+import math
+
+
+def swept_box_clear(nav_grid, start, end, half_size, max_cost):
+    """Check that a square body moving in a straight line from start to end only overlaps open tiles
+
+    Every tile the swept box touches has to be walkable and cost no more than
+    max_cost, so a shortcut never cuts a wall corner or drags the enemy across
+    slow terrain the original path went around.
+
+    Args:
+        nav_grid: Shared NavGrid
+        start: Pixel position (Vector2 or (x, y)) of the body's center at the start
+        end: Pixel position of the body's center at the end
+        half_size: Half the body's width/height in pixels
+        max_cost: Highest tile cost the body may cross
+    """
+    tile_size = nav_grid.tile_size
+    start_x, start_y = start
+    end_x, end_y = end
+    delta_x = end_x - start_x
+    delta_y = end_y - start_y
+
+    first_column = math.floor((min(start_x, end_x) - half_size) / tile_size)
+    last_column = math.ceil((max(start_x, end_x) + half_size) / tile_size) - 1
+    for column in range(first_column, last_column + 1):
+        # body centers whose box overlaps this column lie in (slab_left, slab_right)
+        slab_left = column * tile_size - half_size
+        slab_right = (column + 1) * tile_size + half_size
+        if delta_x == 0:
+            low_y, high_y = min(start_y, end_y), max(start_y, end_y)
+        else:
+            enter = min(max((slab_left - start_x) / delta_x, 0.0), 1.0)
+            leave = min(max((slab_right - start_x) / delta_x, 0.0), 1.0)
+            enter_y = start_y + delta_y * enter
+            leave_y = start_y + delta_y * leave
+            low_y, high_y = min(enter_y, leave_y), max(enter_y, leave_y)
+
+        first_row = math.floor((low_y - half_size) / tile_size)
+        last_row = math.ceil((high_y + half_size) / tile_size) - 1
+        for row in range(first_row, last_row + 1):
+            if nav_grid.cost(column, row) > max_cost:  # walls and off-map tiles cost inf
+                return False
+    return True
+
+
+def smooth_path(nav_grid, start_position, waypoints, half_size=8):
+    """Drop waypoints the enemy can skip by walking straight to a later one
+
+    Only the corners of the tile path (and its last point) are candidates, and
+    from each kept point the furthest candidate with a clear swept-box line is
+    kept next, so long corridors become a single waypoint.
+
+    Args:
+        nav_grid: Shared NavGrid
+        start_position: Where the enemy is now (pixels)
+        waypoints: Tile-center pixel positions (list of Vector2) from the pathfinder
+        half_size: Half the enemy's collision box (16x16 -> 8)
+
+    Returns:
+        list: The kept waypoints, in order (always ends with the last waypoint)
+    """
+    if len(waypoints) < 2:
+        return waypoints
+    tile_size = nav_grid.tile_size
+
+    # corners: points where the step direction changes (plus the goal)
+    corners = []
+    for index in range(len(waypoints) - 1):
+        previous = waypoints[index - 1] if index > 0 else start_position
+        step_in = waypoints[index] - previous
+        step_out = waypoints[index + 1] - waypoints[index]
+        if index == 0 or step_in.x * step_out.y != step_in.y * step_out.x or step_in.dot(step_out) < 0:
+            corners.append(index)
+    corners.append(len(waypoints) - 1)
+
+    def tile_cost(point):
+        # an enemy pressed against a wall (or a flow field target the player is hugging) can sit
+        # on a blocked tile; that mustn't let the shortcut cross walls
+        cost = nav_grid.cost(int(point.x // tile_size), int(point.y // tile_size))
+        return cost if cost != float('inf') else 0
+
+    smoothed = []
+    anchor = start_position
+    anchor_index = -1
+    corner = 0
+    while corner < len(corners):
+        # allowed cost = the worst tile the original path crosses on this stretch
+        max_cost = tile_cost(anchor)
+        for index in range(anchor_index + 1, corners[corner] + 1):
+            max_cost = max(max_cost, tile_cost(waypoints[index]))
+
+        # the next corner is always kept (the original path reaches it), then look further
+        furthest = corner
+        for candidate in range(corner + 1, len(corners)):
+            for index in range(corners[candidate - 1] + 1, corners[candidate] + 1):
+                max_cost = max(max_cost, tile_cost(waypoints[index]))
+            if not swept_box_clear(nav_grid, anchor, waypoints[corners[candidate]], half_size, max_cost):
+                break
+            furthest = candidate
+
+        anchor_index = corners[furthest]
+        anchor = waypoints[anchor_index]
+        smoothed.append(anchor)
+        corner = furthest + 1
+    return smoothed
@@ -0,0 +1,219 @@
+"""
+Optional process pool that solves enemy path requests off the main thread
+"""
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+from nav_grid import NavGrid
+from hierarchical_pathfinding import HierarchicalPathfinder
+from pathfinding import find_path_steps, run_search
+
+
+VERSION_BYTES = 4
+# shared block layout: [sync count][version, costs, uniform][version, costs, uniform]
+# sync() fills the region the workers aren't reading (sync count + 1) % 2, then bumps the count
+SYNC_BYTES = 4
+
+# per worker process, set up by _init_worker
+_worker_memory = None
+_worker_grid = None  # private copy of the shared grid, searched without the main process writing under it
+_worker_hierarchy = None
+_worker_sync_count = None
+
+
+def _region_size(width, height):
+    return VERSION_BYTES + 2 * width * height
+
+
+def _init_worker(memory_name, width, height, tile_size):
+    """Attach to the shared nav grid and build this worker's own HPA* abstraction"""
+    global _worker_memory, _worker_grid, _worker_hierarchy
+    _worker_memory = shared_memory.SharedMemory(name=memory_name)
+    size = width * height
+    _worker_grid = NavGrid.from_buffers(width, height, bytearray(size), bytearray(size), tile_size)
+    _copy_shared_grid()
+    _worker_hierarchy = HierarchicalPathfinder(_worker_grid)
+
+
+def _copy_shared_grid():
+    """Copy the current shared region into _worker_grid if a sync happened since the last copy
+
+    The region being read is only rewritten two syncs later, so a copy is
+    good if the sync count hasn't moved by the time it's finished.
+    """
+    global _worker_sync_count
+    buffer = _worker_memory.buf
+    grid = _worker_grid
+    size = grid.width * grid.height
+    while True:
+        sync_count = int.from_bytes(buffer[:SYNC_BYTES], 'little')
+        if sync_count == _worker_sync_count:
+            return
+        start = SYNC_BYTES + (sync_count % 2) * _region_size(grid.width, grid.height)
+        version = int.from_bytes(buffer[start:start + VERSION_BYTES], 'little')
+        grid.costs[:] = buffer[start + VERSION_BYTES:start + VERSION_BYTES + size]
+        grid.uniform[:] = buffer[start + VERSION_BYTES + size:start + VERSION_BYTES + 2 * size]
+        if int.from_bytes(buffer[:SYNC_BYTES], 'little') == sync_count:
+            grid.version = version
+            _worker_sync_count = sync_count
+            return
+
+
+def _solve(method, start_tile, goal_tiles, max_path_length):
+    """Runs in a worker: path to the first reachable goal in goal_tiles (tile path, or [])"""
+    # picks up the latest sync once per search; the hierarchy rebuilds itself when it
+    # sees the version move (a lock door changed)
+    _copy_shared_grid()
+    for goal_tile in goal_tiles:
+        tile_path = run_search(find_path_steps(_worker_grid, start_tile, goal_tile, max_path_length,
+                                               method, _worker_hierarchy))
+        if tile_path:
+            return tile_path
+    return []
+
+
+class PathWorkerPool:
+    """Solves path requests in worker processes over a shared-memory copy of the nav grid
+
+    Same request() protocol as PathScheduler, but a request is a picklable job
+    (method, start_tile, goal_tiles, max_path_length) instead of a generator, so
+    only stateless A*/JPS/HPA* searches can run here. run() is called once per
+    frame to push nav grid changes into shared memory and collect finished
+    futures; the main loop never waits on a search. A search that raises in
+    a worker (or a pool whose worker died) is dropped rather than re-raised,
+    and accepts() tells the owner to solve it in-process instead.
+
+    Workers are forked so game.py (which has no __main__ guard) isn't re-run in
+    them, which means the pool is only available where fork is (see is_supported).
+    """
+
+    def __init__(self, nav_grid, max_workers=2):
+        self.nav_grid = nav_grid
+        self.memory = shared_memory.SharedMemory(
+            create=True, size=SYNC_BYTES + 2 * _region_size(nav_grid.width, nav_grid.height))
+        self.sync_count = -1
+        self.synced_version = None
+        self.sync()
+
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_init_worker,
+            initargs=(self.memory.name, nav_grid.width, nav_grid.height, nav_grid.tile_size),
+        )
+        self.pending = {}  # owner -> (key, future, last frame the owner asked for it)
+        self.finished = {}  # owner -> (key, tile path, frame it finished)
+        self.failed = {}  # owner -> key whose search failed in a worker
+        self.broken = False  # a worker died; the executor refuses any new work
+        self.frame = 0
+        self.completed_count = 0
+
+    @staticmethod
+    def is_supported():
+        return "fork" in multiprocessing.get_all_start_methods()
+
+    def sync(self):
+        """Copy the nav grid into shared memory if it changed since the last sync
+
+        Writes the region the workers aren't reading and then points them at
+        it, so a search never sees a half-written grid.
+        """
+        grid = self.nav_grid
+        if grid.version == self.synced_version:
+            return
+        size = grid.width * grid.height
+        sync_count = self.sync_count + 1
+        start = SYNC_BYTES + (sync_count % 2) * _region_size(grid.width, grid.height)
+        buffer = self.memory.buf
+        buffer[start:start + VERSION_BYTES] = grid.version.to_bytes(VERSION_BYTES, 'little')
+        buffer[start + VERSION_BYTES:start + VERSION_BYTES + size] = grid.costs
+        buffer[start + VERSION_BYTES + size:start + VERSION_BYTES + 2 * size] = grid.uniform
+        buffer[:SYNC_BYTES] = sync_count.to_bytes(SYNC_BYTES, 'little')
+        self.sync_count = sync_count
+        self.synced_version = grid.version
+
+    def request(self, owner, key, job):
+        """Ask for a path, returning the tile path once it's ready and None while it's being solved
+
+        Args:
+            owner: Object making the request (one outstanding request per owner)
+            key: Hashable description of the query; a different key replaces the old request
+            job: (method, start_tile, goal_tiles, max_path_length) passed to the worker
+        """
+        finished = self.finished.get(owner)
+        if finished is not None and finished[0] == key:
+            del self.finished[owner]
+            return finished[1]
+
+        pending = self.pending.get(owner)
+        if pending is not None and pending[0] == key:
+            self.pending[owner] = (key, pending[1], self.frame)
+            return None
+
+        # new query: drop whatever this owner asked for before
+        self.cancel(owner)
+        try:
+            future = self.executor.submit(_solve, *job)
+        except BrokenProcessPool as error:
+            self._fail(owner, key, error)
+            return None
+        self.pending[owner] = (key, future, self.frame)
+        return None
+
+    def accepts(self, owner, key):
+        """False if the pool can't solve owner's request for key (it failed, or the pool is broken)"""
+        return not self.broken and self.failed.get(owner) != key
+
+    def has_request(self, owner, key):
+        """True if owner's queued or uncollected request is for key (asking again won't resubmit it)"""
+        for request in (self.finished.get(owner), self.pending.get(owner)):
+            if request is not None and request[0] == key:
+                return True
+        return False
+
+    def cancel(self, owner):
+        """Forget any pending or uncollected request from owner"""
+        pending = self.pending.pop(owner, None)
+        if pending is not None:
+            pending[1].cancel()  # no-op if a worker already started it
+        self.finished.pop(owner, None)
+        self.failed.pop(owner, None)
+
+    def run(self):
+        """Push map changes to the workers and collect finished searches (never blocks)"""
+        self.sync()
+        self.frame += 1
+        # same staleness rule as PathScheduler: owners ask every frame until they get their path
+        for owner in [owner for owner, (_, _, asked) in self.pending.items() if asked < self.frame - 1]:
+            self.cancel(owner)
+        for owner in [owner for owner, (_, _, done) in self.finished.items() if done < self.frame - 1]:
+            del self.finished[owner]
+
+        for owner, (key, future, _) in list(self.pending.items()):
+            if future.done():
+                del self.pending[owner]
+                try:
+                    tile_path = future.result()
+                except Exception as error:  # _solve raised, or a worker died (BrokenProcessPool)
+                    self._fail(owner, key, error)
+                    continue
+                self.finished[owner] = (key, tile_path, self.frame)
+                self.completed_count += 1
+
+    def _fail(self, owner, key, error):
+        """Drop owner's request for key so it's solved in-process instead"""
+        if not self.broken:
+            print(f"PathWorkerPool: search failed ({error!r}), falling back to the in-process scheduler")
+        if isinstance(error, BrokenProcessPool):
+            self.broken = True
+        self.failed[owner] = key
+
+    @property
+    def queue_depth(self):
+        return len(self.pending)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+        self.memory.close()
+        self.memory.unlink()
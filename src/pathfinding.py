@@ -0,0 +1,302 @@
+"""
+Grid pathfinding over the shared NavGrid
+"""
+import heapq
+from nav_grid import BLOCKED
+
+
+DIAGONAL_COST = 1.414
+
+# 8-directional movement (cardinals first so ties prefer straight moves)
+DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (1, -1), (-1, 1), (-1, -1)]
+
+# searches written as generators yield after this many expansions so a caller
+# (the PathScheduler) can pause them when its frame budget runs out
+SLICE_EXPANSIONS = 32
+
+
+def run_search(steps):
+    """Drive a search generator to completion and return its result"""
+    while True:
+        try:
+            next(steps)
+        except StopIteration as finished:
+            return finished.value
+
+
+def octile_distance(x1, y1, x2, y2):
+    """Admissible heuristic for 8-directional movement with DIAGONAL_COST diagonals"""
+    dx = abs(x1 - x2)
+    dy = abs(y1 - y2)
+    return (dx + dy) + (DIAGONAL_COST - 2) * min(dx, dy)
+
+
+def reconstruct_path(came_from, node, width):
+    """Walk parent pointers back from node, returning tiles from start (excluded) to node"""
+    path = []
+    while node in came_from:
+        path.append((node % width, node // width))
+        node = came_from[node]
+    path.reverse()
+    return path
+
+
+def a_star(nav_grid, start_tile, goal_tile, max_nodes=300):
+    """A* with 8 directions, parent pointers and g-score relaxation (see a_star_steps)"""
+    return run_search(a_star_steps(nav_grid, start_tile, goal_tile, max_nodes))
+
+
+def a_star_steps(nav_grid, start_tile, goal_tile, max_nodes=300):
+    """A* with 8 directions, parent pointers and g-score relaxation, as a resumable generator
+
+    Args:
+        nav_grid: Shared NavGrid with per-tile costs
+        start_tile: (tile_x, tile_y) to search from
+        goal_tile: (tile_x, tile_y) to reach
+        max_nodes: Expansion budget before giving up
+
+    Yields None every SLICE_EXPANSIONS expansions.
+
+    Returns:
+        list: Tiles from the one after start up to and including goal, or [] if not found
+    """
+    width = nav_grid.width
+    height = nav_grid.height
+    costs = nav_grid.costs
+
+    start_x, start_y = start_tile
+    goal_x, goal_y = goal_tile
+    if not (0 <= start_x < width and 0 <= start_y < height):
+        return []
+    if not nav_grid.is_walkable(goal_x, goal_y):
+        return []  # nothing to find, don't burn the node budget proving it
+
+    start = start_y * width + start_x
+    goal = goal_y * width + goal_x
+
+    g_score = {start: 0}
+    came_from = {}
+    closed = set()
+    start_h = octile_distance(start_x, start_y, goal_x, goal_y)
+    # entries are (f, h, node): ties on f go to the node closest to the goal
+    open_heap = [(start_h, start_h, start)]
+    nodes_expanded = 0
+
+    while open_heap and nodes_expanded < max_nodes:
+        _, _, current = heapq.heappop(open_heap)
+
+        # stale heap entry: the cheapest entry for this node was already expanded
+        if current in closed:
+            continue
+        closed.add(current)
+        nodes_expanded += 1
+        if nodes_expanded % SLICE_EXPANSIONS == 0:
+            yield
+
+        if current == goal:
+            return reconstruct_path(came_from, current, width)
+
+        current_g = g_score[current]
+        current_x = current % width
+        current_y = current // width
+
+        for step_x, step_y in DIRECTIONS:
+            neighbor_x = current_x + step_x
+            neighbor_y = current_y + step_y
+            if neighbor_x < 0 or neighbor_x >= width or neighbor_y < 0 or neighbor_y >= height:
+                continue
+
+            neighbor = neighbor_y * width + neighbor_x
+            if neighbor in closed:
+                continue
+
+            move_cost = costs[neighbor]
+            if move_cost == BLOCKED:
+                continue
+
+            if step_x != 0 and step_y != 0:
+                # no corner cutting so agents don't clip thru walls
+                if (costs[current_y * width + neighbor_x] == BLOCKED or
+                        costs[neighbor_y * width + current_x] == BLOCKED):
+                    continue
+                move_cost *= DIAGONAL_COST
+
+            new_g = current_g + move_cost
+            if new_g >= g_score.get(neighbor, float('inf')):
+                continue
+
+            g_score[neighbor] = new_g
+            came_from[neighbor] = current
+            h_cost = octile_distance(neighbor_x, neighbor_y, goal_x, goal_y)
+            heapq.heappush(open_heap, (new_g + h_cost, h_cost, neighbor))
+
+    return []
+
+
+def jump_point_search(nav_grid, start_tile, goal_tile, max_nodes=300):
+    """Jump Point Search with 8 directions and no corner cutting (see jump_point_search_steps)"""
+    return run_search(jump_point_search_steps(nav_grid, start_tile, goal_tile, max_nodes))
+
+
+def jump_point_search_steps(nav_grid, start_tile, goal_tile, max_nodes=300):
+    """Jump Point Search with 8 directions and no corner cutting, as a resumable generator
+
+    Straight runs over uniform-cost floor are skipped in one jump so only jump
+    points count against max_nodes. Jumps stop on any tile that is slow or next
+    to a slow tile (nav_grid.uniform), so the search degrades to plain A* steps
+    with real costs around slow terrain. Yields None every SLICE_EXPANSIONS expansions.
+
+    Returns:
+        list: Tiles from the one after start up to and including goal (same format as a_star), or []
+    """
+    width = nav_grid.width
+    height = nav_grid.height
+    costs = nav_grid.costs
+    uniform = nav_grid.uniform
+
+    start_x, start_y = start_tile
+    goal_x, goal_y = goal_tile
+    if not (0 <= start_x < width and 0 <= start_y < height):
+        return []
+    if not nav_grid.is_walkable(goal_x, goal_y):
+        return []
+
+    def walkable(x, y):
+        return 0 <= x < width and 0 <= y < height and costs[y * width + x] != BLOCKED
+
+    def jump(x, y, dx, dy):
+        """Walk from (x, y) in direction (dx, dy) until a jump point, returns (x, y, steps) or None"""
+        steps = 0
+        while True:
+            next_x = x + dx
+            next_y = y + dy
+            if not walkable(next_x, next_y):
+                return None
+            if dx != 0 and dy != 0 and not (walkable(next_x, y) and walkable(x, next_y)):
+                return None  # would cut a corner
+            x = next_x
+            y = next_y
+            steps += 1
+
+            if (x == goal_x and y == goal_y) or not uniform[y * width + x]:
+                return x, y, steps
+
+            if dx != 0 and dy != 0:
+                # a diagonal step is a jump point if either straight component finds one
+                if jump(x, y, dx, 0) or jump(x, y, 0, dy):
+                    return x, y, steps
+            elif dx != 0:
+                if ((walkable(x, y - 1) and not walkable(x - dx, y - 1)) or
+                        (walkable(x, y + 1) and not walkable(x - dx, y + 1))):
+                    return x, y, steps
+            else:
+                if ((walkable(x - 1, y) and not walkable(x - 1, y - dy)) or
+                        (walkable(x + 1, y) and not walkable(x + 1, y - dy))):
+                    return x, y, steps
+
+    start = start_y * width + start_x
+    goal = goal_y * width + goal_x
+
+    g_score = {start: 0}
+    came_from = {}
+    closed = set()
+    start_h = octile_distance(start_x, start_y, goal_x, goal_y)
+    open_heap = [(start_h, start_h, start)]
+    nodes_expanded = 0
+
+    while open_heap and nodes_expanded < max_nodes:
+        _, _, current = heapq.heappop(open_heap)
+        if current in closed:
+            continue
+        closed.add(current)
+        nodes_expanded += 1
+        if nodes_expanded % SLICE_EXPANSIONS == 0:
+            yield
+
+        if current == goal:
+            return _expand_jump_path(came_from, current, width)
+
+        current_g = g_score[current]
+        current_x = current % width
+        current_y = current // width
+
+        # prune directions using the parent, except at the start and around slow tiles
+        if current in came_from and uniform[current]:
+            parent = came_from[current]
+            dx = (current_x > parent % width) - (current_x < parent % width)
+            dy = (current_y > parent // width) - (current_y < parent // width)
+            if dx != 0 and dy != 0:
+                directions = [(0, dy), (dx, 0), (dx, dy)]
+            elif dx != 0:
+                directions = [(dx, 0), (0, 1), (0, -1), (dx, 1), (dx, -1)]
+            else:
+                directions = [(0, dy), (1, 0), (-1, 0), (1, dy), (-1, dy)]
+        else:
+            directions = DIRECTIONS
+
+        for step_x, step_y in directions:
+            jump_point = jump(current_x, current_y, step_x, step_y)
+            if jump_point is None:
+                continue
+            jump_x, jump_y, steps = jump_point
+            neighbor = jump_y * width + jump_x
+            if neighbor in closed:
+                continue
+
+            # every tile before the jump point is normal cost, the last one may be slow
+            move_cost = (steps - 1) + costs[neighbor]
+            if step_x != 0 and step_y != 0:
+                move_cost *= DIAGONAL_COST
+
+            new_g = current_g + move_cost
+            if new_g >= g_score.get(neighbor, float('inf')):
+                continue
+
+            g_score[neighbor] = new_g
+            came_from[neighbor] = current
+            h_cost = octile_distance(jump_x, jump_y, goal_x, goal_y)
+            heapq.heappush(open_heap, (new_g + h_cost, h_cost, neighbor))
+
+    return []
+
+
+def find_path_steps(nav_grid, start_tile, goal_tile, max_path_length, method="astar", hierarchy=None, max_nodes=300):
+    """Distance-capped A* (or JPS with method="jps"), as a resumable generator
+
+    Goals more than max_path_length manhattan tiles away, and goals the budgeted
+    search can't reach, go to hierarchy (a HierarchicalPathfinder) when there is one.
+
+    Returns:
+        list: Tiles from the one after start up to and including goal, or [] if not found
+    """
+    manhattan_distance = abs(start_tile[0] - goal_tile[0]) + abs(start_tile[1] - goal_tile[1])
+    if manhattan_distance > max_path_length:
+        return hierarchy.find_path(start_tile, goal_tile) if hierarchy is not None else []
+
+    search_steps = jump_point_search_steps if method == "jps" else a_star_steps
+    tile_path = yield from search_steps(nav_grid, start_tile, goal_tile, max_nodes)
+
+    # Node budget ran out (or goal unreachable) - HPA* settles it without a budget
+    if not tile_path and hierarchy is not None:
+        tile_path = hierarchy.find_path(start_tile, goal_tile)
+    return tile_path
+
+
+def _expand_jump_path(came_from, node, width):
+    """Reconstruct a jump point path and fill in every tile between jump points"""
+    jump_points = [(node % width, node // width)]
+    while node in came_from:
+        node = came_from[node]
+        jump_points.append((node % width, node // width))
+    jump_points.reverse()
+
+    path = []
+    for (from_x, from_y), (to_x, to_y) in zip(jump_points, jump_points[1:]):
+        step_x = (to_x > from_x) - (to_x < from_x)
+        step_y = (to_y > from_y) - (to_y < from_y)
+        x, y = from_x, from_y
+        while (x, y) != (to_x, to_y):
+            x += step_x
+            y += step_y
+            path.append((x, y))
+    return path
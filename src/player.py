@@ -1,7 +1,7 @@
 import pygame
-from bottle import BottleProjectile
 import player_animator
 from collision_utils import handle_full_collision
+from spatial_hash import nearby_rects
 
 speed = 100
 
@@ -172,11 +172,15 @@ class Player(pygame.sprite.Sprite):
             self.box_animation_stage = 0
 
     def throw_bottle(self):
-        """Throw a bottle in the direction the player is facing"""
+        """Throw a bottle in the direction the player is facing
+
+        Returns:
+            tuple: (position, direction) for ProjectileManager.spawn_bottle, or None
+        """
         if self.bottle:
             self.bottle = False
             bottle_pos = (self.position.x, self.position.y)
-            return BottleProjectile(bottle_pos, self.animator.current_direction)
+            return bottle_pos, self.animator.current_direction
         return None
 
     def _get_drop_position_if_clear(self, collision_rects, enemy_group=None, item_name="item"):
@@ -197,7 +201,7 @@ class Player(pygame.sprite.Sprite):
         
         # check for collisions with walls/objects
         collision_found = False
-        for collision_rect in collision_rects:
+        for collision_rect in nearby_rects(collision_rects, item_rect):
             if item_rect.colliderect(collision_rect):
                 collision_found = True
                 break
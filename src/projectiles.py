@@ -0,0 +1,198 @@
+"""
+Struct-of-arrays projectile system for thrown bottles and enemy bullets
+"""
+from array import array
+from bottle import BottleProjectile, BulletProjectile, get_bottle_sprites, get_bullet_frames
+from sound_system import sound_system
+from spatial_hash import sweep_box
+
+
+BOTTLE = 0
+BULLET = 1
+
+BOX_SIZES = (16, 8)  # collision box side per kind (BOTTLE, BULLET)
+BOTTLE_SPEED = 200  # pixels per second
+PLAYER_HIT_RADIUS = 12  # roughly the size of the player
+SOUND_OFFSET = 20  # bottle break sound is moved back this far from the wall it hit
+VIEW_MARGIN = 16  # projectiles this close to the screen edge still get a sprite
+
+DIRECTION_VECTORS = {"up": (0, -1), "down": (0, 1), "left": (-1, 0), "right": (1, 0)}
+
+
+class ProjectileManager:
+    """Every projectile in flight, stored as parallel arrays instead of one sprite each
+
+    update() advances and collides all of them in a single pass (a swept box
+    against the collision world's grid, plus a segment test against the player
+    for bullets). Sprites are only built for projectiles inside the camera view
+    by sync_sprites(), so off-screen bullets cost a few floats and no drawing.
+    Removal swaps the last projectile into the freed slot, so the arrays stay
+    dense and indices are only stable within a frame. Sprites that go off
+    screen (or whose projectile is gone) wait in a pool per kind and are reset
+    for the next projectile, so firing doesn't build sprites or load images.
+    """
+
+    def __init__(self):
+        self.xs = array('d')
+        self.ys = array('d')
+        self.velocity_xs = array('d')
+        self.velocity_ys = array('d')
+        self.kinds = array('B')
+        self.directions = []  # facing used for the sprite
+        self.sprites = []  # materialized sprite, or None while off screen
+        self.sprite_pools = ([], [])  # idle sprites per kind (BOTTLE, BULLET)
+        self.sprites_created = 0
+
+        # load the shared images now (the display is already set up) rather than on the first throw
+        get_bottle_sprites()
+        get_bullet_frames()
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def spawn(self, kind, position, direction, speed):
+        step_x, step_y = DIRECTION_VECTORS.get(direction, (0, 0))
+        self.xs.append(position[0])
+        self.ys.append(position[1])
+        self.velocity_xs.append(step_x * speed)
+        self.velocity_ys.append(step_y * speed)
+        self.kinds.append(kind)
+        self.directions.append(direction)
+        self.sprites.append(None)
+
+    def spawn_bottle(self, position, direction):
+        self.spawn(BOTTLE, position, direction, BOTTLE_SPEED)
+
+    def spawn_bullet(self, position, direction, speed):
+        self.spawn(BULLET, position, direction, speed)
+
+    def _remove(self, index):
+        """Drop the projectile at index by moving the last one into its slot"""
+        self._release_sprite(index)
+        last = len(self.kinds) - 1
+        for column in (self.xs, self.ys, self.velocity_xs, self.velocity_ys, self.kinds, self.directions, self.sprites):
+            column[index] = column[last]
+            del column[last]
+
+    def clear(self):
+        """Remove every projectile (player death)"""
+        for index in range(len(self.sprites)):
+            self._release_sprite(index)
+        for column in (self.xs, self.ys, self.velocity_xs, self.velocity_ys, self.kinds, self.directions, self.sprites):
+            del column[:]
+
+    def update(self, dt, collision_rects, player_position=None):
+        """Move every projectile, removing the ones that reach a wall
+
+        Each move is swept (see spatial_hash.sweep_box), so a long frame can't
+        carry a projectile through a thin wall, and bullets are tested against
+        the whole stretch they covered this frame rather than their end point.
+
+        Args:
+            dt: Frame time in seconds
+            collision_rects: CollisionWorld (or plain list) of static rects
+            player_position: Player center, or None to skip bullet hits
+
+        Returns:
+            bool: True if a bullet hit the player
+        """
+        xs, ys = self.xs, self.ys
+        velocity_xs, velocity_ys = self.velocity_xs, self.velocity_ys
+        kinds = self.kinds
+        if player_position is not None:
+            player_x, player_y = player_position
+        hit_radius_squared = PLAYER_HIT_RADIUS * PLAYER_HIT_RADIUS
+        player_hit = False
+
+        index = 0
+        while index < len(kinds):
+            kind = kinds[index]
+            start_x, start_y = xs[index], ys[index]
+            move_x, move_y = velocity_xs[index] * dt, velocity_ys[index] * dt
+            size = BOX_SIZES[kind]
+            half = size / 2
+            hit_time, _ = sweep_box(collision_rects, start_x - half, start_y - half, size, size, move_x, move_y)
+            if hit_time is not None:
+                move_x *= hit_time
+                move_y *= hit_time
+            xs[index] = start_x + move_x
+            ys[index] = start_y + move_y
+
+            if kind == BULLET and player_position is not None:
+                # closest point to the player on the stretch the bullet covered this frame
+                travel_squared = move_x * move_x + move_y * move_y
+                along = 0.0
+                if travel_squared > 0:
+                    along = ((player_x - start_x) * move_x + (player_y - start_y) * move_y) / travel_squared
+                    along = max(0.0, min(1.0, along))
+                offset_x = start_x + move_x * along - player_x
+                offset_y = start_y + move_y * along - player_y
+                if offset_x * offset_x + offset_y * offset_y <= hit_radius_squared:
+                    player_hit = True
+
+            if hit_time is None:
+                index += 1
+                continue
+
+            if kind == BOTTLE:
+                self._break_bottle(index)
+            self._remove(index)  # the last projectile now sits at index and still needs moving
+        return player_hit
+
+    def _break_bottle(self, index):
+        """Make the noise enemies investigate where a bottle hit a wall"""
+        velocity_x, velocity_y = self.velocity_xs[index], self.velocity_ys[index]
+        # offset back towards where the bottle came from so enemies investigate on the correct side of the wall
+        sound_x = self.xs[index] - (velocity_x / abs(velocity_x) if velocity_x != 0 else 0) * SOUND_OFFSET
+        sound_y = self.ys[index] - (velocity_y / abs(velocity_y) if velocity_y != 0 else 0) * SOUND_OFFSET
+        sound_system.add_sound(
+            position=(sound_x, sound_y),
+            sound_type='bottle_break',
+            range_radius=80,  # ADJUSTABLE: hearing range for bottle break
+            duration=333  # sound lasts for 333ms as specified
+        )
+
+    def _acquire_sprite(self, index, center):
+        """Sprite for the projectile at index, taken from its kind's pool when one is idle"""
+        kind = self.kinds[index]
+        pool = self.sprite_pools[kind]
+        if pool:
+            sprite = pool.pop()
+            sprite.reset(center, self.directions[index])
+        else:
+            sprite_class = BottleProjectile if kind == BOTTLE else BulletProjectile
+            sprite = sprite_class(center, self.directions[index])
+            self.sprites_created += 1
+        self.sprites[index] = sprite
+        return sprite
+
+    def _release_sprite(self, index):
+        """Take the projectile at index off screen and return its sprite to the pool"""
+        sprite = self.sprites[index]
+        if sprite is not None:
+            sprite.kill()
+            self.sprite_pools[self.kinds[index]].append(sprite)
+            self.sprites[index] = None
+
+    def sync_sprites(self, camera_group, dt):
+        """Give on-screen projectiles a sprite in camera_group and drop the sprites of the rest
+
+        Call after the camera is centered for the frame, right before drawing.
+        """
+        view = camera_group.view.inflate(VIEW_MARGIN * 2, VIEW_MARGIN * 2)
+        sprites = self.sprites
+        for index in range(len(self.kinds)):
+            x, y = self.xs[index], self.ys[index]
+            sprite = sprites[index]
+            if not view.collidepoint(x, y):
+                self._release_sprite(index)
+                continue
+
+            center = (int(x), int(y))
+            if sprite is None:
+                sprite = self._acquire_sprite(index, center)
+            elif self.kinds[index] == BOTTLE:
+                sprite.update(dt)  # spin animation
+            if not camera_group.has(sprite):
+                camera_group.add(sprite, layer=1)  # above ground, below player
+            sprite.rect.center = center
@@ -0,0 +1,51 @@
+"""
+LRU cache of line of sight results, shared by all enemies
+"""
+from collections import OrderedDict
+
+
+class SightCache:
+    """Remembers recent line of sight answers keyed by (start pixel, end pixel)
+
+    Endpoints are rounded down to whole pixels and the check runs on the
+    rounded points, so a key always has one answer: an enemy standing still
+    looking at a book or a hidden player costs a dict lookup. Every entry is
+    dropped when the sight grid's version moves (a lock door opened or
+    respawned), same as PathCache with the nav grid.
+    """
+
+    def __init__(self, sight_grid, max_entries=1024):
+        self.sight_grid = sight_grid
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # (start, end) -> bool, least recently used first
+        self.version = sight_grid.version
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def has_line_of_sight(self, start, end):
+        """Cached SightGrid.has_line_of_sight between the pixels containing start and end"""
+        if self.version != self.sight_grid.version:
+            self.entries.clear()
+            self.version = self.sight_grid.version
+            self.invalidations += 1
+
+        key = (int(start[0]), int(start[1]), int(end[0]), int(end[1]))
+        visible = self.entries.get(key)
+        if visible is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return visible
+
+        self.misses += 1
+        visible = self.sight_grid.has_line_of_sight(key[:2], key[2:])
+        self.entries[key] = visible
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return visible
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
@@ -0,0 +1,148 @@
+"""
+Opaque-tile bitmap and grid raycasts for enemy line of sight
+"""
+import math
+import pygame
+from spatial_hash import nearby_rects, sweep_box
+
+
+CLEAR = 0  # no collider reaches into the tile
+PARTIAL = 1  # some collider reaches into it: test the ray against those rects
+SOLID = 2  # one collider covers the whole tile: any ray through it is blocked
+
+
+class SightGrid:
+    """Per-tile opacity for line of sight checks, shared by every enemy
+
+    A sight line is blocked where a small square probe (clearance pixels each
+    way) moved along it would overlap a collision rect, so each rect marks the
+    tiles it reaches once grown by the clearance. has_line_of_sight() walks
+    only the tiles the line crosses (Amanatides-Woo), stops at the first SOLID
+    one and tests the line exactly against the rects of the PARTIAL ones.
+    With a VisibilityTable attached, most short checks are a bit test instead.
+    """
+
+    def __init__(self, collision_rects, width, height, tile_size=16, clearance=4):
+        self.collision_rects = collision_rects
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        self.clearance = clearance
+        # opacity[y * width + x] -> CLEAR, PARTIAL or SOLID
+        self.opacity = bytearray(width * height)
+        self.version = 0  # bumped whenever refresh_rects changes the map
+        self.visibility_table = None  # optional precomputed tile-to-tile answers (see VisibilityTable)
+
+        for rect in collision_rects:
+            for tile_x, tile_y in self._tiles_reached(rect):
+                index = tile_y * width + tile_x
+                self.opacity[index] = max(self.opacity[index], self._rect_opacity(rect, tile_x, tile_y))
+
+    def _tiles_reached(self, rect):
+        """Tiles (in bounds) that rect overlaps once grown by the clearance"""
+        tile_size = self.tile_size
+        clearance = self.clearance
+        first_x = max(0, (rect.left - clearance) // tile_size)
+        last_x = min(self.width - 1, (rect.right + clearance - 1) // tile_size)
+        first_y = max(0, (rect.top - clearance) // tile_size)
+        last_y = min(self.height - 1, (rect.bottom + clearance - 1) // tile_size)
+        for tile_y in range(first_y, last_y + 1):
+            for tile_x in range(first_x, last_x + 1):
+                yield tile_x, tile_y
+
+    def _rect_opacity(self, rect, tile_x, tile_y):
+        """How much of the tile a single rect blocks"""
+        tile_size = self.tile_size
+        tile_rect = pygame.Rect(tile_x * tile_size, tile_y * tile_size, tile_size, tile_size)
+        reach = rect.inflate(self.clearance * 2, self.clearance * 2)
+        # the probe only counts as blocked strictly inside reach (touching edges don't collide)
+        if reach.inflate(-2, -2).contains(tile_rect):
+            return SOLID
+        if reach.colliderect(tile_rect):
+            return PARTIAL
+        return CLEAR
+
+    def _tile_reach(self, tile_x, tile_y):
+        """Area whose rects can block a sight line inside this tile"""
+        tile_size = self.tile_size
+        clearance = self.clearance
+        return pygame.Rect(tile_x * tile_size - clearance, tile_y * tile_size - clearance,
+                           tile_size + clearance * 2, tile_size + clearance * 2)
+
+    def refresh_rects(self, rects):
+        """Recompute the tiles around rects just added to or removed from the collision world (lock doors)"""
+        width = self.width
+        for rect in rects:
+            for tile_x, tile_y in self._tiles_reached(rect):
+                opacity = CLEAR
+                tile_reach = self._tile_reach(tile_x, tile_y)
+                for other in nearby_rects(self.collision_rects, tile_reach):
+                    opacity = max(opacity, self._rect_opacity(other, tile_x, tile_y))
+                    if opacity == SOLID:
+                        break
+                self.opacity[tile_y * width + tile_x] = opacity
+        if rects:
+            self.version += 1
+            if self.visibility_table is not None:
+                self.visibility_table.patch(rects)
+
+    def has_line_of_sight(self, start, end):
+        """True if nothing blocks the probe moving in a straight line from start to end (pixels)"""
+        start_x, start_y = start
+        end_x, end_y = end
+        delta_x = end_x - start_x
+        delta_y = end_y - start_y
+        tile_size = self.tile_size
+        width = self.width
+        opacity = self.opacity
+
+        tile_x, tile_y = int(start_x // tile_size), int(start_y // tile_size)
+        end_tile_x, end_tile_y = int(end_x // tile_size), int(end_y // tile_size)
+        if self.visibility_table is not None:
+            known = self.visibility_table.lookup(tile_x, tile_y, end_tile_x, end_tile_y)
+            if known is not None:
+                return known
+
+        step_x = 1 if delta_x > 0 else -1
+        step_y = 1 if delta_y > 0 else -1
+        # fraction of the line travelled at the next column / row boundary, and per whole tile
+        if delta_x != 0:
+            next_x = (tile_x + (step_x > 0)) * tile_size
+            t_max_x, t_delta_x = (next_x - start_x) / delta_x, tile_size / abs(delta_x)
+        else:
+            t_max_x = t_delta_x = math.inf
+        if delta_y != 0:
+            next_y = (tile_y + (step_y > 0)) * tile_size
+            t_max_y, t_delta_y = (next_y - start_y) / delta_y, tile_size / abs(delta_y)
+        else:
+            t_max_y = t_delta_y = math.inf
+
+        candidates = {}  # rects near the PARTIAL tiles crossed, tested together at the end
+        while True:
+            if 0 <= tile_x < width and 0 <= tile_y < self.height:
+                state = opacity[tile_y * width + tile_x]
+                if state == SOLID:
+                    return False
+                if state == PARTIAL:
+                    for rect in nearby_rects(self.collision_rects, self._tile_reach(tile_x, tile_y)):
+                        candidates[id(rect)] = rect
+
+            if tile_x == end_tile_x and tile_y == end_tile_y:
+                break
+            if t_max_x < t_max_y:
+                if t_max_x > 1:
+                    break
+                tile_x += step_x
+                t_max_x += t_delta_x
+            else:
+                if t_max_y > 1:
+                    break
+                tile_y += step_y
+                t_max_y += t_delta_y
+
+        if not candidates:
+            return True
+        clearance = self.clearance
+        hit_time, _ = sweep_box(list(candidates.values()), start_x - clearance, start_y - clearance,
+                                clearance * 2, clearance * 2, delta_x, delta_y)
+        return hit_time is None
@@ -0,0 +1,116 @@
+"""
+Wall-aware sound propagation over the navigation grid
+"""
+import heapq
+import math
+import pygame
+from nav_grid import BLOCKED
+from pathfinding import DIAGONAL_COST, DIRECTIONS
+
+
+class SoundPropagation:
+    """How far one sound travels around the walls, shared by every enemy that listens to it
+
+    A bounded Dijkstra spreads from the walkable tile nearest the sound (a
+    bottle breaks against a wall, so its own tile is often blocked) through
+    the tiles that aren't BLOCKED, up to max_distance pixels of travel. An
+    enemy hears the sound if its tile was reached within its hearing range,
+    and goes to investigate the tile the sound spread from, which is walkable
+    by construction.
+    """
+
+    def __init__(self, nav_grid, position, max_distance, search_radius=2):
+        self.nav_grid = nav_grid
+        self.version = nav_grid.version
+        self.max_distance = max_distance
+        self.distances = {}  # tile index -> travel distance in pixels
+        self.investigation_position = None  # where listeners should go (None if nowhere walkable)
+
+        tile_size = nav_grid.tile_size
+        sound_x, sound_y = position
+        source = self._find_source(int(sound_x // tile_size), int(sound_y // tile_size), search_radius)
+        if source is None:
+            return
+        source_x, source_y = source
+        if (source_x, source_y) == (int(sound_x // tile_size), int(sound_y // tile_size)):
+            self.investigation_position = pygame.Vector2(position)
+        else:
+            self.investigation_position = pygame.Vector2(source_x * tile_size + tile_size // 2,
+                                                         source_y * tile_size + tile_size // 2)
+        self._spread(source_y * nav_grid.width + source_x)
+
+    def _find_source(self, tile_x, tile_y, search_radius):
+        """The sound's tile if walkable, else the first walkable tile on rings around it"""
+        if self._is_walkable(tile_x, tile_y):
+            return tile_x, tile_y
+        for radius in range(1, search_radius + 1):
+            for delta_x in range(-radius, radius + 1):
+                for delta_y in range(-radius, radius + 1):
+                    if abs(delta_x) != radius and abs(delta_y) != radius:
+                        continue
+                    if self._is_walkable(tile_x + delta_x, tile_y + delta_y):
+                        return tile_x + delta_x, tile_y + delta_y
+        return None
+
+    def _is_walkable(self, tile_x, tile_y):
+        grid = self.nav_grid
+        return grid.in_bounds(tile_x, tile_y) and grid.costs[tile_y * grid.width + tile_x] != BLOCKED
+
+    def _spread(self, source):
+        grid = self.nav_grid
+        width, height = grid.width, grid.height
+        costs = grid.costs
+        tile_size = grid.tile_size
+        # distances in tiles while spreading (slow tiles don't muffle sound), pixels once stored
+        limit = self.max_distance / tile_size
+        distance = {source: 0}
+        heap = [(0, source)]
+        while heap:
+            current_distance, current = heapq.heappop(heap)
+            if current_distance > distance[current]:
+                continue
+            current_x = current % width
+            current_y = current // width
+            for step_x, step_y in DIRECTIONS:
+                neighbor_x = current_x + step_x
+                neighbor_y = current_y + step_y
+                if neighbor_x < 0 or neighbor_x >= width or neighbor_y < 0 or neighbor_y >= height:
+                    continue
+                neighbor = neighbor_y * width + neighbor_x
+                if costs[neighbor] == BLOCKED:
+                    continue
+                move_cost = 1
+                if step_x != 0 and step_y != 0:
+                    # no squeezing through diagonal wall corners either
+                    if (costs[current_y * width + neighbor_x] == BLOCKED or
+                            costs[neighbor_y * width + current_x] == BLOCKED):
+                        continue
+                    move_cost = DIAGONAL_COST
+                new_distance = current_distance + move_cost
+                if new_distance <= limit and new_distance < distance.get(neighbor, math.inf):
+                    distance[neighbor] = new_distance
+                    heapq.heappush(heap, (new_distance, neighbor))
+        self.distances = {index: tiles * tile_size for index, tiles in distance.items()}
+
+    def distance_to(self, position):
+        """Travel distance (pixels) from the sound to the tile at position, or None if it doesn't get there
+
+        A listener standing on a blocked tile (hugging a wall) hears through
+        its closest reached neighbor.
+        """
+        grid = self.nav_grid
+        tile_size = grid.tile_size
+        tile_x, tile_y = int(position[0] // tile_size), int(position[1] // tile_size)
+        if not grid.in_bounds(tile_x, tile_y):
+            return None
+        distance = self.distances.get(tile_y * grid.width + tile_x)
+        if distance is not None or grid.costs[tile_y * grid.width + tile_x] != BLOCKED:
+            return distance
+        for step_x, step_y in DIRECTIONS:
+            if grid.in_bounds(tile_x + step_x, tile_y + step_y):
+                neighbor_distance = self.distances.get((tile_y + step_y) * grid.width + tile_x + step_x)
+                if neighbor_distance is not None:
+                    step = tile_size * (DIAGONAL_COST if step_x and step_y else 1)
+                    if distance is None or neighbor_distance + step < distance:
+                        distance = neighbor_distance + step
+        return distance
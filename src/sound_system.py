@@ -1,42 +1,110 @@
+import heapq
 import pygame
+from sound_propagation import SoundPropagation
+
+
+class SoundEvent:
+    """One noise the AI can hear"""
+    __slots__ = ('x', 'y', 'type', 'range', 'start_time', 'duration', 'order', 'cell', 'propagation')
+
+    def __init__(self, x, y, sound_type, range_radius, start_time, duration, order, cell):
+        self.x = x
+        self.y = y
+        self.type = sound_type
+        self.range = range_radius
+        self.start_time = start_time
+        self.duration = duration
+        self.order = order  # sounds added earlier are reported first
+        self.cell = cell  # grid cell it's bucketed in
+        self.propagation = None  # SoundPropagation, made by the first enemy that listens
+
+    @property
+    def position(self):
+        return (self.x, self.y)
+
+    @property
+    def end_time(self):
+        return self.start_time + self.duration
+
 
 class SoundSystem:
-    """Global sound system to track audio events for AI"""
-    def __init__(self):
-        self.active_sounds = []  # list of active sound events
-    
+    """Global sound system to track audio events for AI
+
+    Sounds are bucketed in a coarse grid so a hearing check only measures the
+    sounds in the cells its range reaches, and their expiry times are kept in a
+    min-heap so update() only touches the sounds that just ran out.
+    """
+    def __init__(self, cell_size=128):
+        self.cell_size = cell_size
+        self.cells = {}  # (cell_x, cell_y) -> {sound: None} (dict as an ordered set)
+        self.expiry_heap = []  # (end_time, order, sound), soonest to expire first
+        self.sound_count = 0  # sounds ever added, to order them
+
     def add_sound(self, position, sound_type, range_radius, duration=333):
         """Add a sound event that lasts for the specified duration (in ms)
-        
+
         Default duration of 333ms ensures sounds don't miss the AI check window
         since enemies check for transitions every 333ms
         """
         current_time = pygame.time.get_ticks()
-        sound_event = {
-            'position': position,
-            'type': sound_type,
-            'range': range_radius,
-            'start_time': current_time,
-            'duration': duration
-        }
-        self.active_sounds.append(sound_event)
-    
+        x, y = position
+        cell = (int(x // self.cell_size), int(y // self.cell_size))
+        sound = SoundEvent(x, y, sound_type, range_radius, current_time, duration, self.sound_count, cell)
+        self.sound_count += 1
+        self.cells.setdefault(cell, {})[sound] = None
+        heapq.heappush(self.expiry_heap, (sound.end_time, sound.order, sound))
+
     def update(self):
         """Remove expired sound events"""
         current_time = pygame.time.get_ticks()
-        self.active_sounds = [
-            sound for sound in self.active_sounds 
-            if current_time - sound['start_time'] < sound['duration']
-        ]
-    
-    def get_sounds_in_range(self, position, hearing_range):
-        """Get all active sounds within hearing range of the given position"""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= current_time:
+            _, _, sound = heapq.heappop(heap)
+            bucket = self.cells[sound.cell]
+            del bucket[sound]
+            if not bucket:
+                del self.cells[sound.cell]
+
+    def get_sounds_in_range(self, position, hearing_range, sound_type=None):
+        """Get all active sounds (of sound_type, if given) within hearing range of the given position, oldest first"""
+        x, y = position
+        size = self.cell_size
+        range_squared = hearing_range * hearing_range
         sounds_in_range = []
-        for sound in self.active_sounds:
-            distance = pygame.Vector2(sound['position']).distance_to(position)
-            if distance <= hearing_range:
-                sounds_in_range.append(sound)
+        cells = self.cells
+        for cell_y in range(int((y - hearing_range) // size), int((y + hearing_range) // size) + 1):
+            for cell_x in range(int((x - hearing_range) // size), int((x + hearing_range) // size) + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if not bucket:
+                    continue
+                for sound in bucket:
+                    if sound_type is not None and sound.type != sound_type:
+                        continue
+                    offset_x, offset_y = sound.x - x, sound.y - y
+                    if offset_x * offset_x + offset_y * offset_y <= range_squared:
+                        sounds_in_range.append(sound)
+        if len(sounds_in_range) > 1:
+            sounds_in_range.sort(key=lambda sound: sound.order)
         return sounds_in_range
 
+    def get_sounds_heard(self, position, hearing_range, nav_grid, sound_type=None):
+        """(sound, propagation) for the active sounds that reach position within hearing_range going around walls
+
+        Travel distance is never shorter than the straight line, so only the
+        sounds get_sounds_in_range finds are spread. Each sound is spread once
+        over nav_grid and reused by every listener, unless the map changed or
+        a listener hears further than it was spread.
+        """
+        heard = []
+        for sound in self.get_sounds_in_range(position, hearing_range, sound_type):
+            propagation = sound.propagation
+            if (propagation is None or propagation.nav_grid is not nav_grid or propagation.version != nav_grid.version
+                    or propagation.max_distance < hearing_range):
+                propagation = sound.propagation = SoundPropagation(nav_grid, sound.position, hearing_range)
+            distance = propagation.distance_to(position)
+            if distance is not None and distance <= hearing_range:
+                heard.append((sound, propagation))
+        return heard
+
 # Global sound system instance
 sound_system = SoundSystem()
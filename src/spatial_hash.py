@@ -0,0 +1,147 @@
+"""
+Uniform-grid spatial hash for static collision rectangles
+"""
+import math
+import pygame
+
+
+class SpatialHash:
+    """Buckets rects by the grid cells they overlap so a query only sees nearby rects
+
+    It can be passed anywhere a list of collision rects is expected: iterating
+    it yields every rect once, and the collision helpers call query() instead of
+    scanning the whole map (see CollisionWorld for the map's instance).
+    """
+
+    def __init__(self, rects=(), cell_size=16):
+        self.cell_size = cell_size
+        # rects are keyed by id() (pygame.Rect isn't hashable) so removal doesn't scan
+        self.cells = {}  # (cell_x, cell_y) -> {id: rect} for rects overlapping that cell
+        self.rects = {}  # id -> rect, in insertion order
+        for rect in rects:
+            self.insert(rect)
+
+    def _cell_range(self, rect):
+        """Inclusive cell bounds (first_x, first_y, last_x, last_y) a rect overlaps"""
+        size = self.cell_size
+        # right/bottom are exclusive, and touching rects don't collide
+        return (rect.left // size, rect.top // size,
+                (rect.right - 1) // size, (rect.bottom - 1) // size)
+
+    def insert(self, rect):
+        self.rects[id(rect)] = rect
+        first_x, first_y, last_x, last_y = self._cell_range(rect)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                self.cells.setdefault((cell_x, cell_y), {})[id(rect)] = rect
+
+    def remove(self, rect):
+        """Remove this exact rect object (no-op if it isn't indexed)"""
+        if self.rects.pop(id(rect), None) is None:
+            return
+        first_x, first_y, last_x, last_y = self._cell_range(rect)
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = self.cells.get((cell_x, cell_y))
+                if bucket is not None:
+                    bucket.pop(id(rect), None)
+                    if not bucket:
+                        del self.cells[(cell_x, cell_y)]
+
+    def query(self, rect):
+        """Rects in the cells rect overlaps (a superset of the ones it collides with)"""
+        first_x, first_y, last_x, last_y = self._cell_range(rect)
+        cells = self.cells
+        if first_x == last_x and first_y == last_y:
+            bucket = cells.get((first_x, first_y))
+            return bucket.values() if bucket else ()
+
+        # rects spanning several cells are in each bucket, report them once
+        found = {}
+        for cell_y in range(first_y, last_y + 1):
+            for cell_x in range(first_x, last_x + 1):
+                bucket = cells.get((cell_x, cell_y))
+                if bucket:
+                    found.update(bucket)
+        return found.values()
+
+    def collides(self, rect):
+        """True if rect overlaps any indexed rect"""
+        return any(rect.colliderect(indexed) for indexed in self.query(rect))
+
+    def __iter__(self):
+        return iter(self.rects.values())
+
+    def __len__(self):
+        return len(self.rects)
+
+
+def nearby_rects(collision_rects, rect):
+    """Rects worth testing against rect: a SpatialHash query, or the whole list for plain lists"""
+    if isinstance(collision_rects, SpatialHash):
+        return collision_rects.query(rect)
+    return collision_rects
+
+
+def _time_of_impact(left, top, right, bottom, delta_x, delta_y, rect):
+    """Fraction (0..1) of the move at which a moving box starts overlapping rect, or None
+
+    Slab test on each axis: the box overlaps rect while both axes overlap, so
+    the hit starts at the later of the two entry times. Touching edges don't
+    count, same as Rect.colliderect.
+    """
+    if delta_x > 0:
+        entry_x, exit_x = (rect.left - right) / delta_x, (rect.right - left) / delta_x
+    elif delta_x < 0:
+        entry_x, exit_x = (rect.right - left) / delta_x, (rect.left - right) / delta_x
+    elif right > rect.left and left < rect.right:
+        entry_x, exit_x = -math.inf, math.inf
+    else:
+        return None
+
+    if delta_y > 0:
+        entry_y, exit_y = (rect.top - bottom) / delta_y, (rect.bottom - top) / delta_y
+    elif delta_y < 0:
+        entry_y, exit_y = (rect.bottom - top) / delta_y, (rect.top - bottom) / delta_y
+    elif bottom > rect.top and top < rect.bottom:
+        entry_y, exit_y = -math.inf, math.inf
+    else:
+        return None
+
+    entry = max(entry_x, entry_y)
+    if entry >= min(exit_x, exit_y) or entry >= 1 or min(exit_x, exit_y) <= 0:
+        return None
+    return max(entry, 0.0)  # already overlapping at the start -> hit right away
+
+
+def sweep_box(collision_rects, left, top, width, height, delta_x, delta_y):
+    """Continuous collision for a box moving in a straight line
+
+    Only the rects in the cells the swept box covers are tested (see nearby_rects),
+    so an axis-aligned move costs the tiles it crosses, and nothing is skipped
+    however large the move is.
+
+    Args:
+        collision_rects: SpatialHash (or plain list) of static rects
+        left, top, width, height: The box at the start of the move (floats are fine)
+        delta_x, delta_y: The move in pixels
+
+    Returns:
+        tuple: (fraction of the move before the first hit, rect hit), or (None, None)
+    """
+    right = left + width
+    bottom = top + height
+    area_left = math.floor(min(left, left + delta_x))
+    area_top = math.floor(min(top, top + delta_y))
+    area = pygame.Rect(area_left, area_top,
+                       math.ceil(max(right, right + delta_x)) - area_left,
+                       math.ceil(max(bottom, bottom + delta_y)) - area_top)
+
+    first_hit = None
+    hit_rect = None
+    for rect in nearby_rects(collision_rects, area):
+        hit = _time_of_impact(left, top, right, bottom, delta_x, delta_y, rect)
+        if hit is not None and (first_hit is None or hit < first_hit):
+            first_hit = hit
+            hit_rect = rect
+    return first_hit, hit_rect
@@ -0,0 +1,57 @@
+"""
+Per-tile terrain flags (wall, slow, hide) read from the TMX tile properties
+"""
+
+
+WALL = 1  # 'wall' property: impassable
+SLOW = 2  # 'slow' property: water and the like, slows the player and costs enemies more
+HIDE = 4  # 'hide' property: cover the player can hide in
+
+# tile property name -> flag it sets
+TERRAIN_PROPERTIES = {'wall': WALL, 'slow': SLOW, 'hide': HIDE}
+
+
+class TerrainMap:
+    """Flat, array-backed terrain flags (one byte per tile)
+
+    Filled once by tiles.load_tileset from the tile properties of every
+    visible layer, so a lookup is a single index instead of walking the map
+    layers and their tilesets (tiles.is_tile_slow, which is kept as the slow
+    reference). Lock doors clear and restore WALL at runtime; NavGrid builds
+    and refreshes its movement costs from these flags.
+    """
+
+    def __init__(self, width, height, tile_size=16):
+        self.width = width
+        self.height = height
+        self.tile_size = tile_size
+        # flags[y * width + x] -> WALL | SLOW | HIDE bits
+        self.flags = bytearray(width * height)
+
+    def in_bounds(self, tile_x, tile_y):
+        return 0 <= tile_x < self.width and 0 <= tile_y < self.height
+
+    def set_flag(self, tile_x, tile_y, flag, enabled=True):
+        """Set (or clear) a flag on an in-bounds tile"""
+        index = tile_y * self.width + tile_x
+        if enabled:
+            self.flags[index] |= flag
+        else:
+            self.flags[index] &= ~flag
+
+    def has_flag(self, tile_x, tile_y, flag):
+        """True if the tile has the flag; tiles off the map have none"""
+        if not (0 <= tile_x < self.width and 0 <= tile_y < self.height):
+            return False
+        return self.flags[tile_y * self.width + tile_x] & flag != 0
+
+    def is_wall(self, tile_x, tile_y):
+        return self.has_flag(tile_x, tile_y, WALL)
+
+    def is_slow(self, tile_x, tile_y):
+        return self.has_flag(tile_x, tile_y, SLOW)
+
+    def is_slow_at(self, x, y):
+        """is_slow for the tile under a world position (pixels)"""
+        tile_size = self.tile_size
+        return self.has_flag(int(x // tile_size), int(y // tile_size), SLOW)
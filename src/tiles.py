@@ -1,6 +1,9 @@
 import pygame, sys
 from pytmx.util_pygame import load_pygame
 import pyscroll
+from spatial_hash import SpatialHash
+from collision_world import CollisionWorld
+from terrain import TerrainMap, TERRAIN_PROPERTIES
 
 # built off code from very helpful youtube tutorial:
 # https://www.youtube.com/watch?v=N6xqCwblyiw
@@ -15,15 +18,66 @@ class Tile(pygame.sprite.Sprite):
 
 class Item(pygame.sprite.Sprite):
     def __init__(self, pos, image, item_name, tile_id, groups):
-        super().__init__(groups)
         self.image = image
         self.rect = self.image.get_rect(topleft=pos)
         self.item_name = item_name
         self.tile_id = tile_id
+        # join the groups last: ItemRegistry buckets items by name and rect as they're added
+        super().__init__(groups)
+
+def merge_collision_rects(rects, max_gap=2):
+    """Merge collinear, touching or overlapping rects into larger ones
+    
+    Exact duplicates and rects inside another rect are dropped, then rects sharing a
+    row span (same top and height) are joined when at most max_gap pixels apart, then
+    rects sharing a column span, repeating until nothing changes. The hand-drawn wall
+    colliders stop a pixel or two short of the tile edge, so without the gap a wall
+    never merges; nothing that moves is smaller than 8px, so closing those gaps
+    doesn't change what can get through.
+    """
+    # drop duplicates and rects fully covered by another one
+    unique = list({(rect.x, rect.y, rect.w, rect.h): rect for rect in rects}.values())
+    index = SpatialHash(unique)
+    rects = [rect for rect in unique
+             if not any(other is not rect and other.contains(rect) for other in index.query(rect))]
+    
+    merged_any = True
+    while merged_any:
+        merged_any = False
+        for span_key, start_key, size_key in (
+                (lambda rect: (rect.y, rect.h), lambda rect: rect.x, 'w'),   # rows: join left/right
+                (lambda rect: (rect.x, rect.w), lambda rect: rect.y, 'h')):  # columns: join up/down
+            spans = {}
+            for rect in rects:
+                spans.setdefault(span_key(rect), []).append(rect)
+            rects = []
+            for span in spans.values():
+                span.sort(key=start_key)
+                current = span[0].copy()
+                for rect in span[1:]:
+                    current_end = start_key(current) + getattr(current, size_key)
+                    if start_key(rect) <= current_end + max_gap:
+                        # touching, overlapping or nearly touching along the shared span: one rect covers both
+                        new_end = max(current_end, start_key(rect) + getattr(rect, size_key))
+                        setattr(current, size_key, new_end - start_key(current))
+                        merged_any = True
+                    else:
+                        rects.append(current)
+                        current = rect.copy()
+                rects.append(current)
+    return rects
 
-def load_tileset(filename, tile_size):
+def load_tileset(filename, tile_size, keep_separate_tiles=()):
+    """Load the TMX map, its collision rects, items and per-tile terrain flags
+    
+    Collider rects are merged into larger rectangles (see merge_collision_rects) and
+    returned as a CollisionWorld. The ones of keep_separate_tiles (lock walls) aren't
+    merged and are added under their tile handle so they can be removed later.
+    """
     tmx_data = load_pygame(filename)
     collision_tiles = []
+    separate_collision_tiles = []
+    keep_separate_tiles = set(keep_separate_tiles)
     items = []
 
     # print(f"Loading tileset from {filename}")
@@ -32,9 +86,8 @@ def load_tileset(filename, tile_size):
     # for tileset in tmx_data.tilesets:
     #     print(f"Tileset '{tileset.name}': firstgid={tileset.firstgid}")
     
-    # Create efficient lookup dictionaries for tile properties
-    wall_tiles = {}  # Dictionary: (tile_x, tile_y) -> True if wall
-    slow_tiles = {}  # Dictionary: (tile_x, tile_y) -> True if slow
+    # terrain flags (wall, slow, hide) for every tile, from the tile properties
+    terrain = TerrainMap(tmx_data.width, tmx_data.height, tile_size)
     
     # get all collision data once
     try:
@@ -70,16 +123,12 @@ def load_tileset(filename, tile_size):
                     if gid > 0:
                         gids_in_layer.add(gid)
                         
-                        # Check tile properties and populate lookup dictionaries
+                        # Check tile properties and set the terrain flags they turn on
                         tile_properties = tmx_data.get_tile_properties_by_gid(gid)
-                        if tile_properties:
-                            # Check for wall property
-                            if tile_properties.get('wall', False):
-                                wall_tiles[(x, y)] = True
-                            
-                            # Check for slow property  
-                            if tile_properties.get('slow', False):
-                                slow_tiles[(x, y)] = True
+                        if tile_properties and terrain.in_bounds(x, y):
+                            for property_name, flag in TERRAIN_PROPERTIES.items():
+                                if tile_properties.get(property_name, False):
+                                    terrain.set_flag(x, y, flag)
                         
                         if gid in collision_lookup:
                             # process collision objects for this tile
@@ -91,7 +140,10 @@ def load_tileset(filename, tile_size):
                                     obj.width,
                                     obj.height
                                 )
-                                collision_tiles.append(collision_rect)
+                                if (x, y) in keep_separate_tiles:
+                                    separate_collision_tiles.append(((x, y), collision_rect))
+                                else:
+                                    collision_tiles.append(collision_rect)
                                 collision_count += 1
                         
             # if collision_count > 0:
@@ -144,14 +196,18 @@ def load_tileset(filename, tile_size):
     # create pyscroll map data
     map_data = pyscroll.TiledMapData(tmx_data)
     
-    # Print summary of loaded tile properties
-    # print(f"Wall tiles loaded: {len(wall_tiles)}")
-    # print(f"Slow tiles loaded: {len(slow_tiles)}")
+    # join the per-tile collider slivers into maximal rects, bucketed by tile so movement
+    # only tests the rects next to it; separate tiles go in under their tile handle
+    collider_count = len(collision_tiles) + len(separate_collision_tiles)
+    collision_world = CollisionWorld(merge_collision_rects(collision_tiles), tile_size)
+    for tile, collision_rect in separate_collision_tiles:
+        collision_world.add(collision_rect, tile)
+    print(f"Collision rects: {collider_count} -> {len(collision_world)} after merging")
     
-    return tmx_data, map_data, collision_tiles, items, wall_tiles, slow_tiles
+    return tmx_data, map_data, collision_world, items, terrain
 
 def get_tile_id_at_position(tmx_data, x, y, tile_size=16):
-    """Get the tile ID at a specific world position"""
+    """Get the tile ID at a specific world position (walks the layers; slow, for debugging)"""
     # convert world coordinates to tile coordinates
     tile_x = int(x // tile_size)
     tile_y = int(y // tile_size)
@@ -169,7 +225,11 @@ def get_tile_id_at_position(tmx_data, x, y, tile_size=16):
     return 0  # return 0 if no tile found
 
 def is_tile_slow(tmx_data, x, y, tile_size=16):
-    """Check if the tile at a specific world position has the 'slow' property set to true"""
+    """Check if the tile at a specific world position has the 'slow' property set to true
+
+    Walks every layer and its tileset properties, so it's only a fallback and a
+    reference for TerrainMap.is_slow_at, which the game uses every frame.
+    """
     # convert world coordinates to tile coordinates
     tile_x = int(x // tile_size)
     tile_y = int(y // tile_size)
@@ -189,24 +249,6 @@ def is_tile_slow(tmx_data, x, y, tile_size=16):
     
     return False  # return False if no slow tile found
 
-def is_tile_slow_fast(slow_tiles_dict, tile_x, tile_y):
-    """Fast lookup for slow tiles using precomputed dictionary"""
-    return slow_tiles_dict.get((tile_x, tile_y), False)
-
-def is_tile_wall_fast(wall_tiles_dict, tile_x, tile_y):
-    """Fast lookup for wall tiles using precomputed dictionary"""
-    return wall_tiles_dict.get((tile_x, tile_y), False)
-
-def get_tile_weight_fast(wall_tiles_dict, slow_tiles_dict, tile_x, tile_y):
-    """Get movement cost for a tile position using fast lookup dictionaries"""
-    # Bounds check can be done by the caller if needed
-    if is_tile_wall_fast(wall_tiles_dict, tile_x, tile_y):
-        return float('inf')  # Walls are impassable
-    elif is_tile_slow_fast(slow_tiles_dict, tile_x, tile_y):
-        return 3  # Slow tiles have higher cost
-    else:
-        return 1  # Normal movement cost
-
 def remove_tiles_at_positions(tmx_data, tile_positions, target_layer_name='Walls'):
     """Remove tiles at specific positions on the specified layer"""
     try:
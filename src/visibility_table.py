@@ -0,0 +1,221 @@
+"""
+Precomputed tile-to-tile visibility (potentially visible sets) for enemy sight
+"""
+import hashlib
+import pygame
+from sight_grid import CLEAR
+from spatial_hash import nearby_rects, sweep_box
+
+
+FILE_MAGIC = b"PVS1"
+
+
+class VisibilityTable:
+    """Which nearby tiles are always, or never, visible from each tile
+
+    For every tile and every tile within radius tiles of it, two bitsets record
+    whether every sight line between the two tiles is clear (visible) or every
+    one is blocked (hidden), using the same probe as SightGrid. Both are exact
+    for the whole tile, so a lookup can answer for any point in it; pairs that
+    are neither (a wall corner in between) return None and SightGrid raycasts.
+
+    visible: the square of one tile swept to the other covers every line
+        between them, so a single sweep_box tells whether they're all clear.
+    hidden: one collider reaches across the whole corridor between the tiles.
+
+    Building takes a few seconds, so the table is saved next to the map and
+    reused while the map's colliders are unchanged. Lock doors are patched in
+    place by patch() (SightGrid.refresh_rects calls it).
+    """
+
+    def __init__(self, sight_grid, radius):
+        self.sight_grid = sight_grid
+        self.radius = radius
+        self.span = 2 * radius + 1
+        size = sight_grid.width * sight_grid.height
+        # bit (offset_y + radius) * span + (offset_x + radius) of entry [tile_y * width + tile_x]
+        self.visible = [0] * size
+        self.hidden = [0] * size
+        self.row_bytes = (self.span * self.span + 7) // 8
+
+    @classmethod
+    def load_or_build(cls, sight_grid, sight_range, path):
+        """Table covering sight_range pixels, read from path if it matches this map, else built and saved"""
+        tile_size = sight_grid.tile_size
+        # tiles whose closest points are within sight_range of each other
+        table = cls(sight_grid, sight_range // tile_size + 1)
+        key = table._map_key()
+        if table._load(path, key):
+            print(f"Visibility table loaded from {path}")
+            return table
+        table.build()
+        try:
+            table._save(path, key)
+            print(f"Visibility table built and saved to {path}")
+        except OSError as e:
+            print(f"Warning: Could not save visibility table {path}: {e}")
+        return table
+
+    def _map_key(self):
+        """Digest of everything the table depends on, so a stale file is never used"""
+        grid = self.sight_grid
+        rects = sorted(tuple(rect) for rect in grid.collision_rects)
+        description = repr((grid.width, grid.height, grid.tile_size, grid.clearance, self.radius, rects))
+        return hashlib.sha1(description.encode()).digest()
+
+    def _load(self, path, key):
+        try:
+            with open(path, 'rb') as file:
+                data = file.read()
+        except OSError:
+            return False
+        header = FILE_MAGIC + key
+        size = len(self.visible)
+        if not data.startswith(header) or len(data) != len(header) + 2 * size * self.row_bytes:
+            return False
+        row_bytes = self.row_bytes
+        offset = len(header)
+        for index in range(size):
+            self.visible[index] = int.from_bytes(data[offset:offset + row_bytes], 'little')
+            self.hidden[index] = int.from_bytes(data[offset + row_bytes:offset + 2 * row_bytes], 'little')
+            offset += 2 * row_bytes
+        return True
+
+    def _save(self, path, key):
+        row_bytes = self.row_bytes
+        chunks = [FILE_MAGIC, key]
+        for visible, hidden in zip(self.visible, self.hidden):
+            chunks.append(visible.to_bytes(row_bytes, 'little'))
+            chunks.append(hidden.to_bytes(row_bytes, 'little'))
+        with open(path, 'wb') as file:
+            file.write(b"".join(chunks))
+
+    def build(self):
+        grid = self.sight_grid
+        self._build_tiles([(tile_x, tile_y) for tile_y in range(grid.height) for tile_x in range(grid.width)])
+
+    def patch(self, rects):
+        """Rebuild the entries whose sight lines could cross rects (just added or removed)"""
+        grid = self.sight_grid
+        tile_size = grid.tile_size
+        reach = self.radius + 1  # tiles within radius of any tile the grown rect touches
+        tiles = set()
+        changed_areas = [rect.inflate(grid.clearance * 2, grid.clearance * 2) for rect in rects]
+        for rect in rects:
+            first_x = max(0, (rect.left - grid.clearance) // tile_size - reach)
+            first_y = max(0, (rect.top - grid.clearance) // tile_size - reach)
+            last_x = min(grid.width - 1, (rect.right + grid.clearance - 1) // tile_size + reach)
+            last_y = min(grid.height - 1, (rect.bottom + grid.clearance - 1) // tile_size + reach)
+            tiles.update((tile_x, tile_y) for tile_y in range(first_y, last_y + 1) for tile_x in range(first_x, last_x + 1))
+        self._build_tiles(tiles, changed_areas)
+
+    def _build_tiles(self, tiles, changed_areas=None):
+        """Recompute both bitsets for the given (in bounds) tiles
+
+        With changed_areas, only pairs whose bounding box overlaps one of those
+        pixel areas are recomputed (the rest can't have changed).
+        """
+        grid = self.sight_grid
+        width, height = grid.width, grid.height
+        tile_size = grid.tile_size
+        clearance = grid.clearance
+        radius = self.radius
+        span = self.span
+        box_size = tile_size + 2 * clearance
+
+        # blocked_before[y][x] = number of non-CLEAR tiles above and left of (x, y), so an all-clear
+        # area (nothing to sweep against) is found with four lookups
+        blocked_before = [[0] * (width + 1) for _ in range(height + 1)]
+        for tile_y in range(height):
+            row_total = 0
+            for tile_x in range(width):
+                row_total += grid.opacity[tile_y * width + tile_x] != CLEAR
+                blocked_before[tile_y + 1][tile_x + 1] = blocked_before[tile_y][tile_x + 1] + row_total
+
+        tiles = set(tiles)
+        pair_area = pygame.Rect(0, 0, 0, 0)
+        visible_bits, hidden_bits = self.visible, self.hidden
+        for tile_x, tile_y in tiles:
+            index = tile_y * width + tile_x
+            for offset_y in range(-radius, radius + 1):
+                other_y = tile_y + offset_y
+                if not 0 <= other_y < height:
+                    continue
+                for offset_x in range(-radius, radius + 1):
+                    other_x = tile_x + offset_x
+                    if not 0 <= other_x < width:
+                        continue
+                    # visibility is symmetric: a pair with both tiles in range is solved from its first tile
+                    if (offset_y, offset_x) < (0, 0) and (other_x, other_y) in tiles:
+                        continue
+
+                    low_x, high_x = min(tile_x, other_x), max(tile_x, other_x)
+                    low_y, high_y = min(tile_y, other_y), max(tile_y, other_y)
+                    if changed_areas is not None:
+                        pair_area.update(low_x * tile_size, low_y * tile_size,
+                                         (high_x - low_x + 1) * tile_size, (high_y - low_y + 1) * tile_size)
+                        if pair_area.collidelist(changed_areas) == -1:
+                            continue
+                    blocked = (blocked_before[high_y + 1][high_x + 1] - blocked_before[low_y][high_x + 1]
+                               - blocked_before[high_y + 1][low_x] + blocked_before[low_y][low_x])
+                    if blocked == 0:
+                        is_visible, is_hidden = True, False
+                    else:
+                        hit_time, _ = sweep_box(grid.collision_rects,
+                                                tile_x * tile_size - clearance, tile_y * tile_size - clearance,
+                                                box_size, box_size, offset_x * tile_size, offset_y * tile_size)
+                        is_visible = hit_time is None
+                        is_hidden = not is_visible and self._corridor_blocked(tile_x, tile_y, other_x, other_y)
+
+                    # set the pair's bit in both tiles' entries
+                    other_index = other_y * width + other_x
+                    bit = 1 << ((offset_y + radius) * span + offset_x + radius)
+                    other_bit = 1 << ((radius - offset_y) * span + radius - offset_x)
+                    for entry, entry_bit in ((index, bit), (other_index, other_bit)):
+                        visible_bits[entry] = (visible_bits[entry] | entry_bit) if is_visible else (visible_bits[entry] & ~entry_bit)
+                        hidden_bits[entry] = (hidden_bits[entry] | entry_bit) if is_hidden else (hidden_bits[entry] & ~entry_bit)
+
+    def _corridor_blocked(self, tile_x, tile_y, other_x, other_y):
+        """True if one (grown) collider cuts every line between the two tiles"""
+        grid = self.sight_grid
+        tile_size = grid.tile_size
+        clearance = grid.clearance
+        # closed pixel extents of both tiles
+        left, right = min(tile_x, other_x) * tile_size, (max(tile_x, other_x) + 1) * tile_size
+        top, bottom = min(tile_y, other_y) * tile_size, (max(tile_y, other_y) + 1) * tile_size
+        a_top, a_bottom = tile_y * tile_size, (tile_y + 1) * tile_size
+        b_top, b_bottom = other_y * tile_size, (other_y + 1) * tile_size
+        a_left, a_right = tile_x * tile_size, (tile_x + 1) * tile_size
+        b_left, b_right = other_x * tile_size, (other_x + 1) * tile_size
+
+        area = pygame.Rect(left - clearance, top - clearance,
+                           right - left + 2 * clearance, bottom - top + 2 * clearance)
+        for rect in nearby_rects(grid.collision_rects, area):
+            reach = rect.inflate(clearance * 2, clearance * 2)
+            # spans the corridor left to right, and every line has to cross its rows
+            if reach.left < left and reach.right > right:
+                if (a_bottom < reach.bottom and b_top > reach.top) or (b_bottom < reach.bottom and a_top > reach.top):
+                    return True
+            # or top to bottom, and every line has to cross its columns
+            if reach.top < top and reach.bottom > bottom:
+                if (a_right < reach.right and b_left > reach.left) or (b_right < reach.right and a_left > reach.left):
+                    return True
+        return False
+
+    def lookup(self, tile_x, tile_y, other_x, other_y):
+        """True / False when the table knows the answer for every point in the two tiles, else None"""
+        offset_x = other_x - tile_x
+        offset_y = other_y - tile_y
+        radius = self.radius
+        if not (-radius <= offset_x <= radius and -radius <= offset_y <= radius):
+            return None
+        grid = self.sight_grid
+        if not (0 <= tile_x < grid.width and 0 <= tile_y < grid.height):
+            return None
+        index = tile_y * grid.width + tile_x
+        bit = 1 << ((offset_y + radius) * self.span + offset_x + radius)
+        if self.visible[index] & bit:
+            return True
+        if self.hidden[index] & bit:
+            return False
+        return None